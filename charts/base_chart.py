@@ -31,16 +31,20 @@ def run_experiment(num_documents, diseases_per_doc, prop_hepatite, experiment_na
 
     # Encrypt documents
     start_enc = time.time()
+    encrypted_docs = {}
     for doc_id, (plain, _) in documents.items():
-        server.documents[doc_id] = client.encrypt_document(doc_id, plain, encrypted_folder)
+        encrypted_docs[doc_id] = client.encrypt_document(doc_id, plain, encrypted_folder)
     encrypt_time = time.time() - start_enc
 
     # Index documents
     start_idx = time.time()
+    indices = {}
     for doc_id, (_, tokens) in documents.items():
-        server.indices[doc_id] = client.create_index(doc_id, tokens)
+        indices[doc_id] = client.create_index(doc_id, tokens)
     index_time = time.time() - start_idx
 
+    server.store_batch((doc_id, encrypted_docs[doc_id], indices[doc_id]) for doc_id in documents)
+
     # Measure average search time
     T = client.build_trapdoor("hepatite")
     durations = []
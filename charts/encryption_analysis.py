@@ -0,0 +1,50 @@
+# ---------------------------------------------------------------
+# This script compares the document encryption modes of the client:
+# Fernet (AES-CBC + HMAC, base64 encoded) against the raw chunked
+# AEAD modes (AES-GCM and ChaCha20-Poly1305), measuring ciphertext
+# size overhead and encryption throughput for a batch of documents.
+# Ciphertexts are kept in memory: writing one .enc file per document
+# costs more than the encryption itself and would hide the difference.
+# ---------------------------------------------------------------
+
+import os
+import sys
+import time
+import matplotlib.pyplot as plt
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.client import Client, ENCRYPTION_MODES
+from utils.experiments import DEFAULT_POINT, ensure_corpus
+from utils.generators import load_documents_from_folder
+
+def measure_encryption(enc_mode, documents):
+    """Encrypts all documents with the given mode and returns (seconds, plaintext bytes, ciphertext bytes)."""
+    client = Client(enc_mode=enc_mode)
+    plaintexts = {doc_id: plain for doc_id, (plain, _) in documents.items()}
+
+    start = time.perf_counter()
+    encrypted = client.encrypt_documents(plaintexts)
+    elapsed = time.perf_counter() - start
+
+    plain_bytes = sum(len(p.encode()) for p in plaintexts.values())
+    cipher_bytes = sum(len(c) for c in encrypted.values())
+    return elapsed, plain_bytes, cipher_bytes
+
+if __name__ == "__main__":
+    # cached corpus of 10000 documents in data/cache, shared with the parameter sweeps
+    documents = load_documents_from_folder(ensure_corpus({**DEFAULT_POINT, "num_docs": 10000}))
+
+    sizes, throughputs = [], []
+    for mode in ENCRYPTION_MODES:
+        elapsed, plain_bytes, cipher_bytes = measure_encryption(mode, documents)
+        sizes.append(cipher_bytes / plain_bytes)
+        throughputs.append(plain_bytes / elapsed / 1e6)
+        print(f"{mode:>9}: {elapsed:.3f}s | ciphertext/plaintext = {sizes[-1]:.3f} | {throughputs[-1]:.2f} MB/s")
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+    ax1.bar(ENCRYPTION_MODES, sizes)
+    ax1.set_title("Ciphertext size / plaintext size")
+    ax2.bar(ENCRYPTION_MODES, throughputs)
+    ax2.set_title("Encryption throughput (MB/s)")
+    plt.tight_layout()
+    plt.show()
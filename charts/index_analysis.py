@@ -29,7 +29,7 @@ def run_test(r=10, bloom_size=256):
     start = time.time()
     for doc_id, (_, tokens) in documents.items():
         index = client.create_index(doc_id, tokens)
-        server.indices[doc_id] = index
+        server.store(doc_id, b"", index)
     total_time = time.time() - start
     # change the total documents dinamic
     return 10, total_time
@@ -27,15 +27,17 @@ def run_test(r=18, bloom_size=128):
     client = Client(r=r, bloom_size=bloom_size)
     server = Server()
 
-    # Encrypt documents and store them on the server
+    # Encrypt documents
+    encrypted_docs = {}
     for doc_id, (plaintext, _) in docs.items():
-        encrypted = client.encrypt_document(doc_id, plaintext, "data/encrypted_docs")
-        server.documents[doc_id] = encrypted
+        encrypted_docs[doc_id] = client.encrypt_document(doc_id, plaintext, "data/encrypted_docs")
 
     # Build a local secure index (e.g., Bloom Filter) for each document
+    indices = {}
     for doc_id, (_, tokens) in docs.items():
-        index = client.create_index(doc_id, tokens)
-        server.indices[doc_id] = index
+        indices[doc_id] = client.create_index(doc_id, tokens)
+
+    server.store_batch((doc_id, encrypted_docs[doc_id], indices[doc_id]) for doc_id in docs)
 
     # Generate trapdoor and perform search multiple times to calculate average
     T = client.build_trapdoor("hepatite")
@@ -1,38 +1,36 @@
-import shutil
 import os
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
-from base_chart import run_experiment
 
-results = {}
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.experiments import run_sweep
 
-# Run each configuration 5 times
-for num_diseases in [1, 3, 5, 10, 20, 30, 40, 50]:
-    times = []
-    for run in range(5):
-        experiment_name = f"diseases_{num_diseases}_run{run+1}"
-        *_, avg_search_time = run_experiment(
-            num_documents=1000,
-            diseases_per_doc=num_diseases,
-            prop_hepatite=0.4,
-            experiment_name=experiment_name
-        )
-        times.append(avg_search_time)
+keyword_counts = [1, 3, 5, 10, 20, 30, 40, 50]
+runs = 5
 
-        # Delete generated data folder
-        shutil.rmtree(f"data/exp_{experiment_name}", ignore_errors=True)
+if __name__ == "__main__":
+    # Each configuration runs on 5 corpora (seeds 0-4); corpora and indexes are
+    # cached in data/cache and built in parallel, searches are timed serially
+    rows = run_sweep(
+        {"num_docs": 1000, "keywords_per_doc": keyword_counts, "proportion": 0.4, "r": 10, "bloom_size": 128,
+         "keyword": "hepatite", "seed": list(range(runs))},
+        output="data/experiments/search_time_by_keywords_per_doc.csv",
+    )
+    results = {}
+    for k in keyword_counts:
+        times = [row["search_time_sec"] for row in rows if row["keywords_per_doc"] == k]
+        results[k] = (np.mean(times), np.std(times))
 
-    results[num_diseases] = (np.mean(times), np.std(times))
+    x_vals = sorted(results.keys())
+    y_vals = [results[x][0] for x in x_vals]
 
-x_vals = sorted(results.keys())
-y_vals = [results[x][0] for x in x_vals]
-
-plt.figure(figsize=(8, 5))
-plt.plot(x_vals, y_vals, marker='o')
-plt.title("Search Time vs Number of Keywords per Document")
-plt.xlabel("Keywords per Document")
-plt.ylabel("Average Search Time (s)")
-plt.xticks(x_vals)
-plt.grid(True)
-plt.tight_layout()
-plt.show()
+    plt.figure(figsize=(8, 5))
+    plt.plot(x_vals, y_vals, marker='o')
+    plt.title("Search Time vs Number of Keywords per Document")
+    plt.xlabel("Keywords per Document")
+    plt.ylabel("Average Search Time (s)")
+    plt.xticks(x_vals)
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()
@@ -1,22 +1,87 @@
 from cryptography.fernet import Fernet
-from core.crypto import keygen, trapdoor
+from core.crypto import (
+    keygen, trapdoor, aead_keygen, aead_encrypt_chunks, aead_decrypt_chunks,
+    is_aead_ciphertext, split_chunks, read_chunks, AEAD_ALGORITHMS, DEFAULT_CHUNK_SIZE,
+)
 from core.index import SecureIndex
+import hashlib
+import hmac
+import io
 import os
+import pickle
+
+ENCRYPTION_MODES = ("fernet",) + tuple(AEAD_ALGORITHMS)
+DIGEST_TAG_SIZE = 8   # bytes per keyword tag in a document's keyword digest
 
 class Client:
-    def __init__(self, s=16, r=18, bloom_size=128):
+    def __init__(self, s=16, r=18, bloom_size=128, enc_mode="fernet", chunk_size=DEFAULT_CHUNK_SIZE,
+                 filter_backend="bloom", fingerprint_bits=None):
         """
         Initializes the client:
         - Generates r secret keys of s bits (K_priv)
         - Sets Bloom filter size
         - Generates a symmetric encryption key (AES via Fernet)
+        - Selects the encryption mode for new documents: "fernet" (default),
+          "aesgcm" or "chacha20" (raw chunked AEAD, no base64 overhead)
+        - Selects the per-document filter backend: "bloom" (bloom_size bits) or
+          "xor" (fingerprint_bits per slot, see core.index.XorFilter); by default the
+          xor fingerprints match the false positive rate of the Bloom parameters
         """
+        if enc_mode not in ENCRYPTION_MODES:
+            raise ValueError(f"Unknown encryption mode: {enc_mode}")
         self.K_priv = keygen(s, r)             # list of r secret subkeys of s bits
         self.r = r                             # number of hash functions / PRFs
         self.s = s                             # security parameter (bit length of each key)
         self.bloom_size = bloom_size           # size of the Bloom filter
         self.enc_key = Fernet.generate_key()   # symmetric key for encryption/decryption
         self.cipher = Fernet(self.enc_key)     # AES cipher initialized with the symmetric key
+        self.enc_mode = enc_mode               # encryption mode used for new documents
+        self.aead_key = aead_keygen()          # 256-bit key for the AEAD modes
+        self.chunk_size = chunk_size           # plaintext chunk size for the AEAD modes
+        self._known_folders = set()            # output folders already created
+        self.filter_backend = filter_backend   # filter used by the secure indexes
+        self.fingerprint_bits = fingerprint_bits  # fingerprint size of the "xor" backend (None: match the Bloom rate)
+        self.digest_key = os.urandom(32)       # key of the keyword tags in the document digests
+        self.digest_candidates = 0             # documents checked against their digest
+        self.digest_false_positives = 0        # ... that turned out not to contain the keyword
+
+    def save_keys(self, path):
+        """
+        Persists the secret keys and parameters so that a later session can query the same index
+        The file is created readable by its owner only (mode 0600).
+        """
+        state = {
+            "K_priv": self.K_priv, "r": self.r, "s": self.s, "bloom_size": self.bloom_size,
+            "enc_key": self.enc_key, "enc_mode": self.enc_mode,
+            "aead_key": self.aead_key, "chunk_size": self.chunk_size,
+            "filter_backend": self.filter_backend, "fingerprint_bits": self.fingerprint_bits,
+            "digest_key": self.digest_key,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # the file holds every secret key, so only the owner may read it
+        # (fchmod also tightens a key file written by an older version)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f)
+
+    @classmethod
+    def load_keys(cls, path):
+        """
+        Restores a client previously saved with save_keys (no new keys are generated)
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        client = cls.__new__(cls)
+        client.__dict__.update({"filter_backend": "bloom", "fingerprint_bits": None}, **state)
+        client.cipher = Fernet(client.enc_key)
+        client._known_folders = set()
+        if "digest_key" not in state:
+            # key files saved before digests existed: derive a stable key from the encryption key
+            client.digest_key = hmac.new(client.enc_key, b"keyword digest", hashlib.sha256).digest()
+        client.digest_candidates = 0
+        client.digest_false_positives = 0
+        return client
 
     def build_trapdoor(self, word):
         """
@@ -24,30 +89,155 @@ class Client:
         """
         return trapdoor(self.K_priv, word, self.s)
 
+    def _ensure_folder(self, folder):
+        # os.makedirs is a syscall per document otherwise
+        if folder not in self._known_folders:
+            os.makedirs(folder, exist_ok=True)
+            self._known_folders.add(folder)
+
+    def _encrypt_chunks(self, doc_id, chunks):
+        # the document ID is bound to the ciphertext as associated data
+        return aead_encrypt_chunks(self.aead_key, self.enc_mode, chunks, doc_id.encode(), self.chunk_size)
+
+    def _encrypt(self, doc_id, raw_text):
+        if self.enc_mode == "fernet":
+            return self.cipher.encrypt(raw_text.encode())
+        return b"".join(self._encrypt_chunks(doc_id, split_chunks(raw_text.encode(), self.chunk_size)))
+
     def encrypt_document(self, doc_id, raw_text, output_folder):
         """
-        Encrypts the raw text using Fernet (AES) and saves it to a file named {doc_id}.enc
+        Encrypts the raw text and saves it to a file named {doc_id}.enc
+        - "fernet" mode: Fernet (AES-CBC + HMAC, base64 encoded)
+        - AEAD modes: raw AES-GCM / ChaCha20-Poly1305 over fixed-size chunks
         """
-        os.makedirs(output_folder, exist_ok=True)
-        encrypted = self.cipher.encrypt(raw_text.encode())
+        self._ensure_folder(output_folder)
+        encrypted = self._encrypt(doc_id, raw_text)
         with open(os.path.join(output_folder, f"{doc_id}.enc"), "wb") as f:
             f.write(encrypted)
         return encrypted
 
+    def encrypt_file(self, doc_id, input_path, output_folder):
+        """
+        Streams a plaintext file into {doc_id}.enc chunk by chunk (AEAD modes only),
+        so documents larger than memory can be encrypted. Returns the ciphertext size.
+        """
+        if self.enc_mode == "fernet":
+            raise ValueError("Streaming encryption requires an AEAD mode")
+        self._ensure_folder(output_folder)
+        written = 0
+        with open(input_path, "rb") as src, open(os.path.join(output_folder, f"{doc_id}.enc"), "wb") as dst:
+            for piece in self._encrypt_chunks(doc_id, read_chunks(src, self.chunk_size)):
+                dst.write(piece)
+                written += len(piece)
+        return written
+
+    def encrypt_documents(self, documents, output_folder=None):
+        """
+        Encrypts a batch of documents {doc_id: raw_text}
+        Returns a dictionary doc_id → encrypted bytes
+
+        The ciphertexts are only written to {doc_id}.enc files when output_folder is
+        given. For small documents, creating one file each costs far more than the
+        encryption itself in every mode, so leave it out when the ciphertexts go
+        straight to the server.
+        """
+        if output_folder is None:
+            return {doc_id: self._encrypt(doc_id, raw_text) for doc_id, raw_text in documents.items()}
+        return {doc_id: self.encrypt_document(doc_id, raw_text, output_folder) for doc_id, raw_text in documents.items()}
+
+    def decrypt(self, doc_id, encrypted):
+        """
+        Decrypts ciphertext bytes produced by any of the encryption modes
+        """
+        if is_aead_ciphertext(encrypted):
+            return b"".join(aead_decrypt_chunks(self.aead_key, io.BytesIO(encrypted), doc_id.encode())).decode()
+        return self.cipher.decrypt(encrypted).decode()
+
     def decrypt_document(self, doc_id, input_folder="data/encrypted_docs"):
         """
         Decrypts a previously encrypted document using the same symmetric key
+        Fernet files written before the AEAD modes existed remain readable.
         """
         file_path = os.path.join(input_folder, f"{doc_id}.enc")
         with open(file_path, "rb") as f:
+            if is_aead_ciphertext(f.read(4)):
+                f.seek(0)
+                return b"".join(aead_decrypt_chunks(self.aead_key, f, doc_id.encode())).decode()
+            f.seek(0)
             encrypted = f.read()
         decrypted = self.cipher.decrypt(encrypted).decode()
         return decrypted
 
+    def _keyword_tag(self, word):
+        return hmac.new(self.digest_key, word.encode(), hashlib.sha256).digest()[:DIGEST_TAG_SIZE]
+
+    def _digest_algorithm(self):
+        # digests are always raw AEAD: a few dozen bytes, Fernet would nearly double them
+        return "aesgcm" if self.enc_mode == "fernet" else self.enc_mode
+
+    def create_digest(self, D_id, words):
+        """
+        Builds the encrypted keyword digest of a document, stored on the server next to its body
+        - One truncated HMAC tag per distinct keyword, sorted
+        - Padded with random tags up to len(words), like the index padding
+        - Encrypted and bound to "{D_id}#digest"
+        """
+        unique_words = set(words)
+        tags = {self._keyword_tag(w) for w in unique_words}
+        for _ in range(len(words) - len(unique_words)):
+            tags.add(os.urandom(DIGEST_TAG_SIZE))
+        plaintext = b"".join(sorted(tags))
+        return b"".join(aead_encrypt_chunks(
+            self.aead_key, self._digest_algorithm(), [plaintext], f"{D_id}#digest".encode(), self.chunk_size
+        ))
+
+    def filter_candidates(self, word, digests):
+        """
+        Keeps the candidate documents whose digest contains the keyword
+        digests maps D_id → encrypted digest. Documents stored without a digest
+        (None) cannot be checked here and are kept.
+        """
+        tag = self._keyword_tag(word)
+        matches = []
+        for D_id, digest in digests.items():
+            if digest is not None:
+                plaintext = b"".join(aead_decrypt_chunks(self.aead_key, io.BytesIO(digest), f"{D_id}#digest".encode()))
+                tags = {plaintext[i:i + DIGEST_TAG_SIZE] for i in range(0, len(plaintext), DIGEST_TAG_SIZE)}
+                self.digest_candidates += 1
+                if tag not in tags:
+                    self.digest_false_positives += 1
+                    continue
+            matches.append(D_id)
+        return matches
+
+    def false_discovery_rate(self):
+        """
+        Share of the checked search candidates that the digests exposed as index false positives
+        This is a false discovery rate (false positives / candidates), not the index false
+        positive rate, which is taken over the non-matching documents (see core.index).
+        """
+        if self.digest_candidates == 0:
+            return 0.0
+        return self.digest_false_positives / self.digest_candidates
+
+    def retrieve(self, server, word, candidates=None):
+        """
+        Searches for a keyword and returns {D_id: plaintext} of the true matches:
+        - Runs the index search on the server (unless its candidates are given)
+        - Fetches only the small digests of the candidates and discards the false positives
+        - Fetches and decrypts the bodies of the remaining documents
+        """
+        if candidates is None:
+            candidates = server.search(self.build_trapdoor(word), self.s)
+        digests = server.fetch_digests(candidates)
+        matches = self.filter_candidates(word, {D_id: digests.get(D_id) for D_id in candidates})
+        bodies = server.fetch(matches)
+        return {D_id: self.decrypt(D_id, bodies[D_id]) for D_id in matches}
+
     def create_index(self, D_id, words):
         """
-        Builds a secure Bloom filter index for a document
+        Builds a secure index (Bloom or XOR filter, see filter_backend) for a document
         """
-        index = SecureIndex(self.K_priv, self.bloom_size, self.r, self.s)
+        index = SecureIndex(self.K_priv, self.bloom_size, self.r, self.s, self.filter_backend, self.fingerprint_bits)
         index.build_index(D_id, words)
         return index.indices[D_id]
@@ -1,6 +1,7 @@
 import hmac
 import hashlib
 import os
+from functools import lru_cache
 
 def prf(key: bytes, message: str, s: int) -> int:
     """
@@ -46,4 +47,137 @@ def trapdoor(K_priv: list, w: str, s: int) -> list:
     for k in K_priv:
         result = prf(k, w, s)  # apply PRF with key k and word w
         trapdoor_list.append(result)
-    return trapdoor_list
\ No newline at end of file
+    return trapdoor_list
+
+# ---------------------------------------------------------------
+# Chunked AEAD encryption (AES-GCM / ChaCha20-Poly1305)
+#
+# Layout of an AEAD ciphertext:
+#   magic (4) | algorithm id (1) | chunk size (4) | salt (16) | nonce prefix (7) | chunk_1 | ... | chunk_n
+# Every ciphertext is sealed under its own subkey, derived from the client key
+# and the random salt (HKDF-Expand, as in Tink's streaming AEAD), so the 96-bit
+# nonces only have to be unique within one document.
+# Each chunk is sealed with nonce = prefix || counter (4) || last flag (1),
+# so chunks cannot be reordered, dropped or truncated without detection.
+# ---------------------------------------------------------------
+
+AEAD_MAGIC = b"SSE\x01"
+AEAD_ALGORITHMS = {"aesgcm": 1, "chacha20": 2}
+AEAD_TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_SALT_SIZE = 16
+_NONCE_PREFIX_SIZE = 7
+_HEADER_SIZE = len(AEAD_MAGIC) + 1 + 4 + _SALT_SIZE + _NONCE_PREFIX_SIZE
+
+
+@lru_cache(maxsize=None)
+def _aead_class(algorithm: str):
+    # imported on first use, so commands that never encrypt do not load the AEAD backends
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+    if algorithm == "aesgcm":
+        return AESGCM
+    if algorithm == "chacha20":
+        return ChaCha20Poly1305
+    raise ValueError(f"Unknown AEAD algorithm: {algorithm}")
+
+
+def _aead_cipher(algorithm: str, key: bytes, salt: bytes):
+    # HKDF-Expand (RFC 5869) with the salt as info; the client key is uniformly random,
+    # so it is used directly as the pseudorandom key and one HMAC yields the 256-bit subkey
+    subkey = hmac.digest(key, b"sse aead subkey" + salt + b"\x01", "sha256")
+    return _aead_class(algorithm)(subkey)
+
+
+def aead_keygen() -> bytes:
+    """
+    Generates a random 256-bit key, valid for both AES-GCM and ChaCha20-Poly1305
+    """
+    return os.urandom(32)
+
+
+def is_aead_ciphertext(data: bytes) -> bool:
+    """
+    Tells AEAD ciphertexts apart from Fernet tokens (which always start with b"gAAAAA")
+    """
+    return data[:len(AEAD_MAGIC)] == AEAD_MAGIC
+
+
+def aead_encrypt_chunks(key: bytes, algorithm: str, chunks, associated_data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Encrypts an iterable of plaintext chunks and yields the ciphertext pieces:
+    first the header, then one sealed chunk per plaintext chunk.
+    - Every chunk except the last must be exactly chunk_size bytes
+    - associated_data (e.g. the document ID) is authenticated but not encrypted
+    Every call draws a fresh salt, and with it a fresh subkey, so nonces are never reused
+    under one key (a subkey repeats only if two 128-bit salts collide).
+    """
+    if algorithm not in AEAD_ALGORITHMS:
+        raise ValueError(f"Unknown AEAD algorithm: {algorithm}")
+    random_bytes = os.urandom(_SALT_SIZE + _NONCE_PREFIX_SIZE)
+    salt, prefix = random_bytes[:_SALT_SIZE], random_bytes[_SALT_SIZE:]
+    cipher = _aead_cipher(algorithm, key, salt)
+    yield AEAD_MAGIC + bytes([AEAD_ALGORITHMS[algorithm]]) + chunk_size.to_bytes(4, "big") + random_bytes
+
+    iterator = iter(chunks)
+    current = next(iterator, b"")
+    counter = 0
+    while True:
+        following = next(iterator, None)
+        last = following is None
+        nonce = prefix + counter.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+        yield cipher.encrypt(nonce, current, associated_data)
+        if last:
+            break
+        current = following
+        counter += 1
+
+
+def aead_decrypt_chunks(key: bytes, stream, associated_data: bytes):
+    """
+    Decrypts an AEAD ciphertext read from a binary file-like object and yields plaintext chunks.
+    Raises cryptography.exceptions.InvalidTag if any chunk was modified, reordered or truncated.
+    """
+    header = stream.read(_HEADER_SIZE)
+    if len(header) != _HEADER_SIZE or not is_aead_ciphertext(header):
+        raise ValueError("Not an AEAD ciphertext")
+    algorithm_ids = {v: k for k, v in AEAD_ALGORITHMS.items()}
+    algorithm = algorithm_ids.get(header[4])
+    if algorithm is None:
+        raise ValueError(f"Unknown AEAD algorithm id: {header[4]}")
+    chunk_size = int.from_bytes(header[5:9], "big")
+    salt = header[9:9 + _SALT_SIZE]
+    prefix = header[9 + _SALT_SIZE:]
+    cipher = _aead_cipher(algorithm, key, salt)
+
+    sealed_size = chunk_size + AEAD_TAG_SIZE
+    current = stream.read(sealed_size)
+    counter = 0
+    while True:
+        # read one chunk ahead to know whether the current one is the last
+        following = stream.read(sealed_size) if len(current) == sealed_size else b""
+        last = not following
+        nonce = prefix + counter.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+        yield cipher.decrypt(nonce, current, associated_data)
+        if last:
+            break
+        current = following
+        counter += 1
+
+
+def split_chunks(data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Splits a bytes object into chunk_size pieces
+    """
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def read_chunks(stream, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Reads a binary file-like object in chunk_size pieces, so large files never sit fully in memory
+    """
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
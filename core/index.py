@@ -1,7 +1,31 @@
 from core.crypto import trapdoor, prf
+from array import array
+import hashlib
+import math
+import os
 import random
 
+# "constant_time": every position is checked whatever the earlier bits were (hardened, default)
+# "fast": PRF positions are computed lazily and evaluation stops at the first zero bit
+QUERY_MODES = ("constant_time", "fast")
+
+def bloom_false_positive_rate(size: int, r: int, n: int) -> float:
+    """
+    Expected false positive rate of a Bloom filter of `size` bits with r hash functions holding n words
+    """
+    return (1 - math.exp(-r * n / size)) ** r
+
+def fingerprint_bits_for(fp_rate: float) -> int:
+    """
+    Smallest XOR filter fingerprint (1 to 64 bits) whose false positive rate 2^-bits is at most fp_rate
+    """
+    if fp_rate <= 0:
+        return 64
+    return min(64, max(1, math.ceil(-math.log2(fp_rate))))
+
 class BloomFilter:
+    backend = "bloom"  # index header: which filter backend built this index
+
     def __init__(self, size: int):
         self.size = size
         self.bit_array = [0] * size  # initialize bit array with 0s
@@ -12,23 +36,174 @@ class BloomFilter:
             self.bit_array[h % self.size] = 1
 
     def query(self, hashes: list) -> bool:
-        all_bits_set = True
+        # constant-time: all positions are read and folded with AND, no branch depends on the bits
+        all_bits_set = 1
         for h in hashes:
-            pos = h % self.size
-            if self.bit_array[pos] == 0:
-                all_bits_set = False  # ainda assim continuamos verificando
-        return all_bits_set
+            all_bits_set &= self.bit_array[h % self.size]
+        return all_bits_set == 1
+
+    def query_fast(self, hashes) -> bool:
+        # hashes may be a lazy iterator: positions after the first zero bit are never computed
+        for h in hashes:
+            if self.bit_array[h % self.size] == 0:
+                return False
+        return True
+
+    def pad(self, fake_words: int, r: int):
+        # Goh's padding: r random ones per missing word, so the number of set bits
+        # does not reveal how many distinct words the document has
+        for _ in range(fake_words * r):
+            pos = random.randint(0, self.size - 1)
+            self.bit_array[pos] = 1
+
+    def seal(self):
+        pass
+
+    def size_in_bits(self) -> int:
+        return self.size
+
+    def false_positive_rate(self, r: int) -> float:
+        # estimated from the fill ratio, which already accounts for the padding
+        return (sum(self.bit_array) / self.size) ** r
+
+class XorFilter:
+    """
+    XOR filter (Graf & Lemire, 2020) over the same per-document codewords as the Bloom filter
+
+    The r codewords of a word are collapsed into one key; the filter stores one
+    fingerprint_bits fingerprint per slot, with about 1.23 slots per key for large
+    key sets (proportionally more for the few keys of a document), and a query
+    reads exactly 3 slots. The false positive rate is 2^-fingerprint_bits.
+    The filter is static: insert collects keys and seal builds the table.
+    """
+    backend = "xor"  # index header: which filter backend built this index
+
+    def __init__(self, fingerprint_bits: int = 8):
+        if not 1 <= fingerprint_bits <= 64:
+            raise ValueError("fingerprint_bits must be between 1 and 64")
+        self.fingerprint_bits = fingerprint_bits
+        self.seed = 0
+        self.block_length = 1
+        self.fingerprints = None
+        self._keys = set()
+
+    @staticmethod
+    def _key(hashes) -> bytes:
+        # the r codewords of a word collapse into one 64-bit key
+        return hashlib.blake2b(",".join(map(str, hashes)).encode(), digest_size=8).digest()
+
+    def _probe(self, key: bytes, seed: int, block_length: int):
+        # one slot in each of the three blocks, plus the fingerprint
+        d = hashlib.blake2b(key, digest_size=20, salt=seed.to_bytes(16, "big")).digest()
+        return (
+            int.from_bytes(d[0:4], "big") % block_length,
+            block_length + int.from_bytes(d[4:8], "big") % block_length,
+            2 * block_length + int.from_bytes(d[8:12], "big") % block_length,
+            int.from_bytes(d[12:20], "big") & ((1 << self.fingerprint_bits) - 1),
+        )
+
+    def insert(self, hashes: list):
+        self._keys.add(self._key(hashes))
+
+    def pad(self, fake_words: int, r: int):
+        # Goh's padding: one random key per missing word, mirroring the r random bits of the Bloom filter
+        for _ in range(fake_words):
+            self._keys.add(os.urandom(8))
+
+    @staticmethod
+    def _peel(probes, num_slots):
+        # returns the (key, slot) assignment order, or None if the hypergraph has a cycle
+        count = [0] * num_slots
+        xor_key = [0] * num_slots
+        for i, (h0, h1, h2, _) in enumerate(probes):
+            for h in (h0, h1, h2):
+                count[h] += 1
+                xor_key[h] ^= i
+        stack = [slot for slot in range(num_slots) if count[slot] == 1]
+        order = []
+        while stack:
+            slot = stack.pop()
+            if count[slot] != 1:
+                continue
+            i = xor_key[slot]
+            order.append((i, slot))
+            for h in probes[i][:3]:
+                count[h] -= 1
+                xor_key[h] ^= i
+                if count[h] == 1:
+                    stack.append(h)
+        return order if len(order) == len(probes) else None
+
+    def seal(self):
+        keys = list(self._keys)
+        # per-document key sets are tiny, where a fixed slack over 1.23n would dominate the size:
+        # start just below 1.23n (at least one spare slot) and grow one slot per block whenever
+        # a few seeds in a row fail to peel
+        block_length = max(1, math.ceil(max(1.2 * len(keys), len(keys) + 1) / 3))
+        while True:
+            for _ in range(16):
+                seed = random.getrandbits(64)
+                probes = [self._probe(k, seed, block_length) for k in keys]
+                order = self._peel(probes, 3 * block_length)
+                if order is not None:
+                    fingerprints = [0] * (3 * block_length)
+                    for i, slot in reversed(order):
+                        h0, h1, h2, fp = probes[i]
+                        fingerprints[slot] = fp ^ fingerprints[h0] ^ fingerprints[h1] ^ fingerprints[h2]
+                    typecode = "B" if self.fingerprint_bits <= 8 else "H" if self.fingerprint_bits <= 16 else \
+                        "L" if self.fingerprint_bits <= 32 else "Q"
+                    self.fingerprints = array(typecode, fingerprints)
+                    self.seed = seed
+                    self.block_length = block_length
+                    self._keys = None
+                    return
+            block_length += 1
+
+    def query(self, hashes: list) -> bool:
+        # always exactly 3 reads, no branch depends on the stored fingerprints
+        h0, h1, h2, fp = self._probe(self._key(hashes), self.seed, self.block_length)
+        f = self.fingerprints
+        return (fp ^ f[h0] ^ f[h1] ^ f[h2]) == 0
+
+    def query_fast(self, hashes) -> bool:
+        # the key needs all r codewords, so there is nothing to skip
+        return self.query(list(hashes))
+
+    def size_in_bits(self) -> int:
+        return len(self.fingerprints) * self.fingerprint_bits
+
+    def false_positive_rate(self, r: int = None) -> float:
+        return 2.0 ** -self.fingerprint_bits
+
+FILTER_BACKENDS = {"bloom": BloomFilter, "xor": XorFilter}
 
 class SecureIndex:
-    def __init__(self, K_priv, bloom_size, r, s):
+    def __init__(self, K_priv, bloom_size, r, s, backend="bloom", fingerprint_bits=None):
+        """
+        fingerprint_bits sets the fingerprint size of the "xor" backend; None (default)
+        picks, per document, the smallest one whose false positive rate is at most
+        that of a Bloom filter of bloom_size bits and r hash functions holding the same words
+        """
+        if backend not in FILTER_BACKENDS:
+            raise ValueError(f"Unknown filter backend: {backend}")
         self.K_priv = K_priv
         self.r = r
         self.s = s
         self.bloom_size = bloom_size
+        self.backend = backend
+        self.fingerprint_bits = fingerprint_bits
         self.indices = {}
 
+    def new_filter(self, num_words):
+        if self.backend == "xor":
+            fingerprint_bits = self.fingerprint_bits or fingerprint_bits_for(
+                bloom_false_positive_rate(self.bloom_size, self.r, num_words)
+            )
+            return XorFilter(fingerprint_bits)
+        return BloomFilter(self.bloom_size)
+
     def build_index(self, D_id: str, words: list):
-        bf = BloomFilter(self.bloom_size)
+        bf = self.new_filter(len(words))
         unique_words = set(words)
 
         for w in unique_words:
@@ -44,9 +219,7 @@ class SecureIndex:
 
         u = len(words)
         v = len(unique_words)
-        fake_ones = ((u - v) * self.r)
-        for _ in range(fake_ones):
-            pos = random.randint(0, self.bloom_size - 1)
-            bf.bit_array[pos] = 1
+        bf.pad(u - v, self.r)
+        bf.seal()
 
         self.indices[D_id] = bf
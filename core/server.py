@@ -1,18 +1,216 @@
 from core.crypto import prf
+from core.index import QUERY_MODES
+from core.storage import TieredDocumentStore
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import threading
+import time
+from types import MappingProxyType
 
 class Server:
-    def __init__(self):
-        # dictionary to store Bloom filters per document
-        self.indices = {}
-        # dictionary to store encrypted documents
-        self.documents = {}
+    def __init__(self, cache_size=0, query_mode="constant_time", memory_budget=None, storage_path=None,
+                 readahead_threshold=32):
+        """
+        Initializes the server:
+        - cache_size > 0 enables an LRU cache of search results holding up to
+          cache_size trapdoors (disabled by default)
+        - query_mode selects how each document is tested (see core.index.QUERY_MODES):
+          "constant_time" always computes all r PRFs and reads all r bits,
+          "fast" computes PRFs lazily and stops at the first zero bit
+        - memory_budget (bytes) enables tiered storage: ciphertexts live in the
+          storage_path data file (an anonymous temporary file if None) and only a
+          hot LRU set of them stays in memory; searches with at least
+          readahead_threshold hits prefetch those documents
+        """
+        if query_mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query mode: {query_mode}")
+        self.query_mode = query_mode
+        # dictionary to store Bloom filters per document (read-only view, see store_batch)
+        self._indices = {}
+        # dictionary to store encrypted documents (disk-backed when memory_budget is set)
+        self.memory_budget = memory_budget
+        self.documents = {} if memory_budget is None else TieredDocumentStore(storage_path, memory_budget)
+        self.readahead_threshold = readahead_threshold
+        self._prefetcher = None
+        self._prefetcher_lock = threading.Lock()
+        # encrypted keyword digests per document, kept apart from the bodies
+        self.digests = {}
+        # published snapshot: (entries, count, epoch), replaced atomically by writers
+        # searches only read entries[:count], which writers never modify in place
+        self._snapshot = ([], 0, 0)
+        self._write_lock = threading.Lock()
+        # LRU cache: trapdoor digest → (T_w, s, matching document IDs as an ordered dict)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        # search counters reported by metrics()
+        self._metrics_lock = threading.Lock()
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    @property
+    def indices(self):
+        """
+        Read-only view of the secure index of every stored document (use store/store_batch to add)
+        """
+        return MappingProxyType(self._indices)
+
+    @property
+    def epoch(self):
+        """
+        Number of batches published so far
+        """
+        return self._snapshot[2]
+
+    def store(self, D_id, encrypted_doc, index, digest=None):
+        """
+        Stores the encrypted document, its secure index and optionally its encrypted keyword digest
+        """
+        self.store_batch([(D_id, encrypted_doc, index, digest)])
+
+    def store_batch(self, items):
+        """
+        Stores a batch of (D_id, encrypted_doc, index) or (D_id, encrypted_doc, index, digest)
+        and publishes it atomically
 
-    def store(self, D_id, encrypted_doc, index):
+        Searches run against the snapshot published when they started and never wait
+        for a writer: new documents are appended past the published count, and only
+        replacing an existing document copies the entry list (copy-on-write).
+
+        Cached results are updated incrementally: only the new documents are
+        tested against each cached trapdoor, instead of flushing the cache.
         """
-        Stores the encrypted document and its secure index
+        items = [tuple(item) + (None,) * (4 - len(item)) for item in items]
+        batch = {D_id: index for D_id, _, index, _ in items}
+        with self._write_lock:
+            for D_id, encrypted_doc, _, digest in items:
+                self.documents[D_id] = encrypted_doc
+                if digest is not None:
+                    self.digests[D_id] = digest
+                else:
+                    self.digests.pop(D_id, None)
+
+            entries, count, epoch = self._snapshot
+            replacing = any(D_id in self._indices for D_id in batch)
+            if replacing:
+                # replaced documents keep their position; readers of older epochs keep the previous list
+                entries = [(D_id, batch.get(D_id, bf)) for D_id, bf in entries[:count]]
+            # appended past `count`, so invisible to searches already running
+            entries.extend((D_id, bf) for D_id, bf in batch.items() if D_id not in self._indices)
+
+            # test the changed documents against the cached trapdoors outside the cache lock
+            with self._cache_lock:
+                cached = [(key, T_w, s) for key, (T_w, s, _) in self._cache.items()]
+            updates = {
+                key: [(D_id, self._matches(D_id, bf, T_w, s)) for D_id, bf in batch.items()]
+                for key, T_w, s in cached
+            }
+
+            positions = {D_id: i for i, (D_id, _) in enumerate(entries)} if replacing and cached else {}
+            with self._cache_lock:
+                for key in list(self._cache):
+                    if key not in updates:
+                        # cached by a search that finished while this batch was prepared
+                        del self._cache[key]
+                        continue
+                    results = self._cache[key][2]
+                    for D_id, matched in updates[key]:
+                        if matched:
+                            results[D_id] = None
+                        elif D_id in results:
+                            # the document was replaced by one that no longer matches
+                            del results[D_id]
+                    if replacing:
+                        # a replaced document that now matches must sit at its stored position
+                        ordered = sorted(results, key=positions.__getitem__)
+                        results.clear()
+                        results.update(dict.fromkeys(ordered))
+                self._indices.update(batch)
+                self._snapshot = (entries, len(entries), epoch + 1)
+
+    def save(self, path):
+        """
+        Persists the secure indices and encrypted documents to a single file
+        With tiered storage only the document locations are saved and the ciphertexts stay
+        in the data file. The index is written to a temporary file first, and the data file
+        and the index are only renamed into place once both are complete. A store without a
+        storage_path only lives as long as the process, so its ciphertexts are saved inline.
         """
-        self.documents[D_id] = encrypted_doc
-        self.indices[D_id] = index
+        entries, count, _ = self._snapshot
+        documents = self.documents
+        if isinstance(documents, TieredDocumentStore) and documents.temporary:
+            documents = documents.get_many(list(documents))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                state = {"indices": dict(entries[:count]), "documents": documents, "digests": self.digests}
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            # the previous index and data file are left as they were
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if isinstance(documents, TieredDocumentStore):
+            documents.publish()
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Restores a server previously saved with save
+        Keyword arguments are passed on to the constructor (e.g. cache_size).
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        documents = state["documents"]
+        if isinstance(documents, TieredDocumentStore):
+            # the ciphertexts stay in the saved data file; memory_budget may still be overridden
+            memory_budget = kwargs.pop("memory_budget", None)
+            kwargs.pop("storage_path", None)
+            server = cls(**kwargs)
+            if memory_budget is not None:
+                documents.memory_budget = memory_budget
+            server.memory_budget = documents.memory_budget
+            server.documents = documents
+        else:
+            server = cls(**kwargs)
+            if isinstance(server.documents, TieredDocumentStore):
+                # move an in-memory document table into the server's data file
+                for D_id, encrypted_doc in documents.items():
+                    server.documents[D_id] = encrypted_doc
+            else:
+                server.documents = documents
+        server.digests = state.get("digests", {})
+        server._indices = state["indices"]
+        server._snapshot = (list(server._indices.items()), len(server._indices), 1)
+        return server
+
+    @staticmethod
+    def _cache_key(T_w, s):
+        # digest of the trapdoor, so the cache does not keep one large key per entry
+        return hashlib.sha256(f"{s}:{','.join(map(str, T_w))}".encode()).digest()
+
+    def _matches(self, D_id, bf, T_w, s):
+        key = D_id.encode()
+        if self.query_mode == "fast":
+            # most documents miss, usually on one of the first probes
+            return bf.query_fast(prf(key, str(t), s) for t in T_w)
+
+        # apply PRF to each trapdoor value using the document ID
+        y = []
+        for t in T_w:
+            y_i = prf(key, str(t), s)
+            y.append(y_i)
+
+        # query the Bloom Filter with the computed hash positions
+        return bf.query(y)
 
     def search(self, T_w, s):
         """
@@ -22,20 +220,123 @@ class Server:
         - Applies the PRF to each trapdoor token using the document ID
         - Checks if all resulting hash positions exist in the document's Bloom Filter
         - If so, includes the document ID in the results
+
+        With the cache enabled, repeated trapdoors are answered without rescanning.
         """
+        start = time.perf_counter()
+        try:
+            results = self._search(T_w, s)
+            if isinstance(self.documents, TieredDocumentStore) and len(results) >= self.readahead_threshold:
+                self._prefetch(results)
+            return results
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._metrics_lock:
+                self.searches += 1
+                self.search_seconds += elapsed
+
+    def _search(self, T_w, s):
+        if self.cache_size > 0:
+            key = self._cache_key(T_w, s)
+            with self._cache_lock:
+                entry = self._cache.get(key)
+                if entry is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return list(entry[2])
+                self.cache_misses += 1
+
+        entries, count, epoch = self._snapshot
         results = []
-        positive_count = 0
-
-        for D_id in self.indices:
-            # apply PRF to each trapdoor value using the document ID
-            y = []
-            for t in T_w:
-                y_i = prf(D_id.encode(), str(t), s)
-                y.append(y_i)
-            
-            bf = self.indices[D_id]
-            # query the Bloom Filter with the computed hash positions
-            if bf.query(y):
+        for i in range(count):
+            D_id, bf = entries[i]
+            if self._matches(D_id, bf, T_w, s):
                 results.append(D_id)
-                positive_count += 1
+
+        if self.cache_size > 0:
+            with self._cache_lock:
+                if epoch != self._snapshot[2]:
+                    # a batch was published during the scan, so this result may be stale
+                    return results
+                self._cache[key] = (list(T_w), s, dict.fromkeys(results))
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    self.cache_evictions += 1
         return results
+
+    def _prefetch(self, ids):
+        # read-ahead runs in the background so it never delays the search response
+        with self._prefetcher_lock:
+            if self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(max_workers=1)
+            self._prefetcher.submit(self.documents.prefetch, list(ids))
+
+    def fetch(self, ids):
+        """
+        Returns {D_id: encrypted document} for the requested document IDs
+        """
+        if isinstance(self.documents, TieredDocumentStore):
+            return self.documents.get_many(ids)
+        return {D_id: self.documents[D_id] for D_id in ids}
+
+    def fetch_digests(self, ids):
+        """
+        Returns {D_id: encrypted keyword digest} for the requested documents that have one
+        """
+        return {D_id: self.digests[D_id] for D_id in ids if D_id in self.digests}
+
+    def cache_stats(self):
+        """
+        Returns the result cache counters: hits, misses, evictions, entries and hit rate
+        """
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "evictions": self.cache_evictions,
+                "entries": len(self._cache),
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            }
+
+    def metrics(self):
+        """
+        Returns server-side counters: stored documents, searches served,
+        cumulative search time, the result cache and tiered storage statistics
+        """
+        with self._metrics_lock:
+            searches, search_seconds = self.searches, self.search_seconds
+        return {
+            "documents": self._snapshot[1],
+            "epoch": self._snapshot[2],
+            "searches": searches,
+            "search_time_sec": search_seconds,
+            "cache": self.cache_stats(),
+            "storage": self.documents.stats() if isinstance(self.documents, TieredDocumentStore) else None,
+        }
+
+    def close(self):
+        """
+        Stops the background prefetcher and closes the tiered document store, if any
+        A store that was never saved has its data file deleted.
+        """
+        with self._prefetcher_lock:
+            prefetcher, self._prefetcher = self._prefetcher, None
+        if prefetcher is not None:
+            prefetcher.shutdown(wait=True)
+        if isinstance(self.documents, TieredDocumentStore):
+            self.documents.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def clear_cache(self):
+        """
+        Drops all cached search results
+        """
+        with self._cache_lock:
+            self._cache.clear()
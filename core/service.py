@@ -0,0 +1,87 @@
+import base64
+import json
+import socket
+import socketserver
+
+# ---------------------------------------------------------------
+# Minimal network transport for the Server: one JSON object per line.
+#   {"op": "search", "trapdoor": [...], "s": 16}  ->  {"results": [...]}
+#   {"op": "fetch", "ids": [...]}                 ->  {"documents": {id: base64}}
+#   {"op": "fetch_digests", "ids": [...]}         ->  {"digests": {id: base64}}
+#   {"op": "metrics"}                             ->  {"metrics": {...}}
+# ---------------------------------------------------------------
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # one connection can carry any number of requests
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class SearchService(socketserver.ThreadingTCPServer):
+    """
+    Exposes a Server over TCP, handling each connection in its own thread
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server, host="127.0.0.1", port=8765):
+        self.sse_server = server
+        super().__init__((host, port), _RequestHandler)
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "search":
+            return {"results": self.sse_server.search(request["trapdoor"], request["s"])}
+        if op == "fetch":
+            return {"documents": {
+                D_id: base64.b64encode(data).decode()
+                for D_id, data in self.sse_server.fetch(request["ids"]).items()
+            }}
+        if op == "fetch_digests":
+            return {"digests": {
+                D_id: base64.b64encode(data).decode()
+                for D_id, data in self.sse_server.fetch_digests(request["ids"]).items()
+            }}
+        if op == "metrics":
+            return {"metrics": self.sse_server.metrics()}
+        raise ValueError(f"Unknown operation: {op}")
+
+
+class RemoteServer:
+    """
+    Client-side proxy with the same search interface as Server, talking to a SearchService
+    """
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.sock = socket.create_connection((host, port))
+        self.rfile = self.sock.makefile("rb")
+
+    def _call(self, request):
+        self.sock.sendall(json.dumps(request).encode() + b"\n")
+        response = json.loads(self.rfile.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def search(self, T_w, s):
+        return self._call({"op": "search", "trapdoor": T_w, "s": s})["results"]
+
+    def fetch(self, ids):
+        documents = self._call({"op": "fetch", "ids": list(ids)})["documents"]
+        return {D_id: base64.b64decode(data) for D_id, data in documents.items()}
+
+    def fetch_digests(self, ids):
+        digests = self._call({"op": "fetch_digests", "ids": list(ids)})["digests"]
+        return {D_id: base64.b64decode(data) for D_id, data in digests.items()}
+
+    def metrics(self):
+        return self._call({"op": "metrics"})["metrics"]
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
@@ -0,0 +1,232 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import os
+import tempfile
+import threading
+import weakref
+
+
+def _discard(fd, data_path):
+    # removes a data file that was never published (store closed or garbage collected)
+    os.close(fd)
+    try:
+        os.remove(data_path)
+    except FileNotFoundError:
+        pass
+
+class TieredDocumentStore(MutableMapping):
+    """
+    Dictionary of encrypted documents bounded by a memory budget
+
+    Every ciphertext is appended to a data file and located by (offset, length).
+    The most recently used ciphertexts are kept in memory (hot LRU set) up to
+    memory_budget bytes; the rest are read back from disk on demand.
+    get_many sorts the misses by offset and coalesces nearby ones into a single
+    read (read-ahead), so fetching many search hits costs few disk reads.
+
+    A new store never appends to an existing file: it writes to a uniquely named
+    file next to `path` ("<path>.<random>.new"), which publish() renames into place
+    once the ciphertexts are complete. An unpublished file is removed when the store
+    is closed, garbage collected or the process exits. Without a path the data lives
+    in an anonymous temporary file.
+    """
+    def __init__(self, path=None, memory_budget=64 * 1024 * 1024, readahead_gap=64 * 1024):
+        self.path = path
+        self.memory_budget = memory_budget    # bytes of ciphertext kept in memory
+        self.readahead_gap = readahead_gap    # max gap (bytes) between misses read in one go
+        self._offsets = {}                    # D_id → (offset, length) in the data file
+        self._discard = None
+        if path is None:
+            self._file = tempfile.TemporaryFile(prefix="sse_documents_", suffix=".dat")
+            self._data_path = None
+            self._fd = self._file.fileno()
+        else:
+            folder, name = os.path.split(path)
+            os.makedirs(folder or ".", exist_ok=True)
+            self._file = None
+            # unique name, so two stores for the same path never truncate each other's file
+            self._fd, self._data_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".new", dir=folder or ".")
+            self._discard = weakref.finalize(self, _discard, self._fd, self._data_path)
+        self._init_runtime()
+
+    def _init_runtime(self):
+        self._size = os.fstat(self._fd).st_size
+        self._hot = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_reads = 0
+        self.bytes_read = 0
+
+    @property
+    def temporary(self):
+        """
+        True when the ciphertexts live in an anonymous file that does not outlive the process
+        """
+        return self.path is None
+
+    def publish(self):
+        """
+        Makes the data file durable at `path`, atomically replacing any previous one
+        A pickled store refers to `path`, so it is only usable once published (Server.save does it).
+        """
+        if self.temporary:
+            raise ValueError("A temporary document store has no path to publish to")
+        with self._lock:
+            os.fsync(self._fd)
+            if self._data_path != self.path:
+                os.replace(self._data_path, self.path)
+                self._data_path = self.path
+                self._discard.detach()
+
+    def __getstate__(self):
+        # only the location of each ciphertext is persisted, the data stays in the file
+        if self.temporary:
+            raise ValueError("A temporary document store cannot be pickled, its data file is anonymous")
+        return {"path": self.path, "memory_budget": self.memory_budget,
+                "readahead_gap": self.readahead_gap, "_offsets": self._offsets}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._file = None
+        self._discard = None
+        self._data_path = self.path
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._init_runtime()
+
+    def _admit(self, D_id, data):
+        # caller holds the lock
+        if D_id in self._hot:
+            self._hot_bytes -= len(self._hot.pop(D_id))
+        if len(data) > self.memory_budget:
+            return
+        self._hot[D_id] = data
+        self._hot_bytes += len(data)
+        while self._hot_bytes > self.memory_budget:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def __setitem__(self, D_id, data):
+        data = bytes(data)
+        with self._lock:
+            # append-only: a replaced document leaves its old bytes behind in the file
+            offset = self._size
+            os.pwrite(self._fd, data, offset)
+            self._size += len(data)
+            self._offsets[D_id] = (offset, len(data))
+            self._admit(D_id, data)
+
+    def __getitem__(self, D_id):
+        return self.get_many([D_id])[D_id]
+
+    def __delitem__(self, D_id):
+        with self._lock:
+            del self._offsets[D_id]
+            if D_id in self._hot:
+                self._hot_bytes -= len(self._hot.pop(D_id))
+
+    def __contains__(self, D_id):
+        return D_id in self._offsets
+
+    def __iter__(self):
+        return iter(list(self._offsets))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def get_many(self, ids):
+        """
+        Returns {D_id: ciphertext}, reading all misses from disk in offset order
+        Raises KeyError for unknown document IDs.
+        """
+        return self._load(ids, record=True)
+
+    def _load(self, ids, record):
+        found = {}
+        with self._lock:
+            missing = []
+            for D_id in ids:
+                if D_id in self._hot:
+                    self._hot.move_to_end(D_id)
+                    found[D_id] = self._hot[D_id]
+                    self.hits += record
+                else:
+                    missing.append((*self._offsets[D_id], D_id))
+                    self.misses += record
+        if not missing:
+            return found
+
+        # coalesce misses that are close together in the file into one read
+        missing.sort()
+        runs, current = [], [missing[0]]
+        for item in missing[1:]:
+            run_end = current[-1][0] + current[-1][1]
+            if item[0] - run_end <= self.readahead_gap:
+                current.append(item)
+            else:
+                runs.append(current)
+                current = [item]
+        runs.append(current)
+
+        loaded = {}
+        for run in runs:
+            start = run[0][0]
+            end = max(offset + length for offset, length, _ in run)
+            block = os.pread(self._fd, end - start, start)
+            for offset, length, D_id in run:
+                loaded[D_id] = block[offset - start:offset - start + length]
+            with self._lock:
+                self.disk_reads += 1
+                self.bytes_read += len(block)
+
+        with self._lock:
+            for D_id, data in loaded.items():
+                self._admit(D_id, data)
+        found.update(loaded)
+        return found
+
+    def prefetch(self, ids):
+        """
+        Loads the given documents into the hot set ahead of a fetch (not counted as hits or misses)
+        Stops at the memory budget, since anything beyond it would evict what was just loaded.
+        """
+        selected, total = [], 0
+        for D_id in ids:
+            location = self._offsets.get(D_id)
+            if location is None:
+                continue
+            total += location[1]
+            if total > self.memory_budget:
+                break
+            selected.append(D_id)
+        self._load(selected, record=False)
+
+    def stats(self):
+        """
+        Returns hit/miss counters, disk reads and the current memory use
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "documents": len(self._offsets),
+                "hot_documents": len(self._hot),
+                "hot_bytes": self._hot_bytes,
+                "memory_budget": self.memory_budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "disk_reads": self.disk_reads,
+                "bytes_read": self.bytes_read,
+            }
+
+    def close(self):
+        """
+        Closes the data file; a temporary one, or one that was never published, is deleted
+        """
+        if self._file is not None:
+            self._file.close()
+        elif self._discard is not None and self._discard.alive:
+            self._discard()
+        else:
+            os.close(self._fd)
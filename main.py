@@ -46,18 +46,21 @@ def main():
         batch_doc_ids = all_doc_ids[i:i+current_batch_size]
         batch_docs = {doc_id: all_docs[doc_id] for doc_id in batch_doc_ids}
 
-        # Encrypt each document and store it
+        # Encrypt each document
+        encrypted_docs = {}
         for doc_id, (plaintext, _) in batch_docs.items():
-            encrypted = client.encrypt_document(doc_id, plaintext, output_folder=ENCRYPTED_FOLDER)
-            server.documents[doc_id] = encrypted
+            encrypted_docs[doc_id] = client.encrypt_document(doc_id, plaintext, output_folder=ENCRYPTED_FOLDER)
 
         # Create a secure index for each document
         start_idx = time.time()
+        indices = {}
         for doc_id, (_, tokens) in batch_docs.items():
-            index = client.create_index(doc_id, tokens)
-            server.indices[doc_id] = index
+            indices[doc_id] = client.create_index(doc_id, tokens)
         total_index_time += time.time() - start_idx
 
+        # Publish the whole batch to the server at once
+        server.store_batch((doc_id, encrypted_docs[doc_id], indices[doc_id]) for doc_id in batch_doc_ids)
+
     print("Processing completed")
     print(f"Total indexing time: {total_index_time:.2f} seconds")
 
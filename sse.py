@@ -0,0 +1,306 @@
+"""
+Command-line entry point for the searchable encryption system.
+
+    python sse.py generate --num 1000
+    python sse.py ingest
+    python sse.py search diabetes asma
+    python sse.py serve --port 8765
+    python sse.py bench
+    python sse.py load --concurrency 8 --rate 20
+    python sse.py sweep --r 10 18 --proportion 0.1 0.5
+
+Heavy dependencies (Faker, the cryptography backends) are imported inside each
+subcommand, so `search` only pays for loading the persisted index and keys.
+"""
+import argparse
+import time
+
+START = time.perf_counter()
+
+DOCUMENTS_FOLDER = "data/documents"
+INDEX_FILE = "data/index.pkl"
+KEYS_FILE = "data/client_keys.pkl"
+
+
+def cmd_generate(args):
+    from utils.generators import generate_documents, generate_documents_fixed_keywords
+
+    if args.fixed_keywords:
+        generate_documents_fixed_keywords(args.num, output_folder=args.documents, keywords_per_doc=args.fixed_keywords)
+    else:
+        generate_documents(args.num, output_folder=args.documents, max_diseases_per_patient=args.max_diseases)
+    print(f"Generated {args.num} documents in {args.documents}")
+
+
+def cmd_ingest(args):
+    from utils.generators import load_documents_from_folder
+    from core.client import Client
+    from core.server import Server
+
+    documents = load_documents_from_folder(args.documents)
+    client = Client(s=args.s, r=args.r, bloom_size=args.bloom_size, enc_mode=args.enc_mode,
+                    filter_backend=args.backend, fingerprint_bits=args.fingerprint_bits)
+    # closing the server on failure removes a data file that was never published
+    with Server(memory_budget=args.memory_budget, storage_path=args.storage) as server:
+        start = time.perf_counter()
+        encrypted = client.encrypt_documents({doc_id: plain for doc_id, (plain, _) in documents.items()}, args.encrypted)
+        encrypt_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        server.store_batch(
+            (doc_id, encrypted[doc_id], client.create_index(doc_id, tokens), client.create_digest(doc_id, tokens))
+            for doc_id, (_, tokens) in documents.items()
+        )
+        index_time = time.perf_counter() - start
+
+        client.save_keys(args.keys)
+        server.save(args.index)
+    print(f"Ingested {len(documents)} documents (encrypt {encrypt_time:.2f}s, index {index_time:.2f}s)")
+    print(f"Index: {args.index} | Keys: {args.keys}")
+
+
+def _load(args, **server_options):
+    from core.client import Client
+    from core.server import Server
+
+    return Client.load_keys(args.keys), Server.load(args.index, **server_options)
+
+
+def _search_once(client, server, word, decrypt):
+    start = time.perf_counter()
+    matches = server.search(client.build_trapdoor(word), client.s)
+    elapsed = time.perf_counter() - start
+    print(f"Matching documents: {', '.join(matches) if matches else '(none)'}")
+    print(f"Search time: {elapsed:.6f} seconds")
+    if decrypt:
+        # the digests weed out index false positives before any document body is fetched
+        documents = client.retrieve(server, word, candidates=matches)
+        for doc_id, decrypted in documents.items():
+            print(f"\nDocument {doc_id} content:\n{'-'*40}\n{decrypted}\n{'-'*40}")
+        print(f"{len(matches) - len(documents)} false positives discarded "
+              f"({client.false_discovery_rate():.2%} of the candidates checked so far)")
+
+
+def cmd_search(args):
+    client, server = _load(args, cache_size=args.cache_size, query_mode=args.query_mode, memory_budget=args.memory_budget)
+    print(f"Loaded {len(server.indices)} documents in {time.perf_counter() - START:.3f}s")
+
+    if args.words:
+        for word in args.words:
+            _search_once(client, server, word.strip().lower(), args.decrypt)
+        return
+
+    while True:
+        q = input("Search word (or 'exit'): ").strip().lower()
+        if q == 'exit':
+            break
+        _search_once(client, server, q, args.decrypt)
+
+
+def cmd_serve(args):
+    from core.server import Server
+    from core.service import SearchService
+
+    server = Server.load(args.index, cache_size=args.cache_size, query_mode=args.query_mode,
+                         memory_budget=args.memory_budget)
+    with SearchService(server, args.host, args.port) as service:
+        print(f"Serving {len(server.indices)} documents on {args.host}:{args.port}")
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def _time_search(server, T, s, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches = server.search(T, s)
+        durations.append(time.perf_counter() - start)
+    return matches, durations
+
+
+def cmd_bench(args):
+    import statistics
+    from core.index import QUERY_MODES
+    from utils.generators import DISEASES
+
+    client, server = _load(args)
+    words = args.words or DISEASES
+    modes = QUERY_MODES if args.query_mode == "both" else (args.query_mode,)
+    bits = [bf.size_in_bits() for bf in server.indices.values()]
+    fp_rates = [bf.false_positive_rate(client.r) for bf in server.indices.values()]
+    print(f"Backend: {client.filter_backend} | {len(bits)} documents | "
+          f"{statistics.mean(bits) if bits else 0:.1f} bits per document index | "
+          f"expected false positive rate {statistics.mean(fp_rates) if fp_rates else 0:.2e}\n")
+
+    header = f"{'keyword':>12} {'matches':>8}" + "".join(f" {m + ' (s)':>18}" for m in modes)
+    if len(modes) > 1:
+        header += f" {'speedup':>8}"
+    print(header)
+    for word in words:
+        T = client.build_trapdoor(word)
+        means = []
+        for mode in modes:
+            server.query_mode = mode
+            matches, durations = _time_search(server, T, client.s, args.repeat)
+            means.append(statistics.mean(durations))
+        line = f"{word:>12} {len(matches):>8}" + "".join(f" {m:>18.6f}" for m in means)
+        if len(modes) > 1:
+            line += f" {means[0] / means[1]:>7.2f}x"
+        print(line)
+
+
+def cmd_load(args):
+    from core.client import Client
+    from utils.loadgen import keyword_workload, run_load
+
+    client = Client.load_keys(args.keys)
+    if args.connect:
+        from core.service import RemoteServer
+
+        host, port = args.connect.rsplit(":", 1)
+        connect = lambda: RemoteServer(host, int(port))
+    else:
+        from core.server import Server
+
+        server = Server.load(args.index, cache_size=args.cache_size, query_mode=args.query_mode,
+                             memory_budget=args.memory_budget)
+        connect = lambda: server
+
+    workload = keyword_workload(args.requests, seed=args.seed)
+    report = run_load(connect, client, workload, concurrency=args.concurrency, rate=args.rate,
+                      sample_interval=args.sample_interval, seed=args.seed, fetch=args.fetch)
+
+    print(f"{'elapsed (s)':>11} {'completed':>9} {'searches':>9} {'search time (s)':>15} {'cache hit rate':>14} "
+          f"{'storage hit rate':>16}")
+    for sample in report["timeline"]:
+        storage = f"{sample['storage']['hit_rate']:.2%}" if sample.get("storage") else "-"
+        print(f"{sample['elapsed_sec']:>11.2f} {sample['completed']:>9} {sample['searches']:>9} "
+              f"{sample['search_time_sec']:>15.3f} {sample['cache']['hit_rate']:>14.2%} {storage:>16}")
+    print(f"\nRequests: {report['completed']}/{report['requests']} completed, {len(report['errors'])} errors "
+          f"| concurrency {report['concurrency']} | rate {report['rate'] or 'unbounded'}")
+    print(f"Throughput: {report['throughput_rps']:.2f} req/s over {report['duration_sec']:.2f}s")
+    print("Latency: " + ", ".join(
+        f"{name} {report[f'latency_{name}_sec'] * 1000:.2f}ms" for name in ("mean", "p50", "p95", "p99", "max")
+    ))
+    if report["errors"]:
+        print(f"First error: {report['errors'][0]}")
+
+
+def cmd_sweep(args):
+    from utils.experiments import run_sweep
+
+    sweep = {
+        "generator": args.generator, "num_docs": args.num_docs, "keywords_per_doc": args.keywords_per_doc,
+        "proportion": args.proportion, "r": args.r, "bloom_size": args.bloom_size, "keyword": args.keyword,
+        "query_mode": args.query_mode, "backend": args.backend, "fingerprint_bits": args.fingerprint_bits,
+    }
+    rows = run_sweep(sweep, output=args.output, cache_folder=args.cache, workers=args.workers, repeats=args.repeat,
+                     max_parallel_docs=args.max_parallel_docs)
+    print(f"{len(rows)} sweep points written to {args.output}")
+
+
+def _fingerprint_bits(value):
+    return None if value == "auto" else int(value)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sse", description="Document-based searchable encryption (Goh's secure indexes)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="generate synthetic documents")
+    p.add_argument("--num", type=int, default=100)
+    p.add_argument("--documents", default=DOCUMENTS_FOLDER)
+    p.add_argument("--max-diseases", type=int, default=5)
+    p.add_argument("--fixed-keywords", type=int, default=0, help="exactly N keywords per document")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("ingest", help="encrypt and index documents, persisting the index and keys")
+    p.add_argument("--documents", default=DOCUMENTS_FOLDER)
+    p.add_argument("--encrypted", default=None, help="also write each ciphertext to FOLDER/{doc_id}.enc")
+    p.add_argument("--index", default=INDEX_FILE)
+    p.add_argument("--keys", default=KEYS_FILE)
+    p.add_argument("--s", type=int, default=16)
+    p.add_argument("--r", type=int, default=18)
+    p.add_argument("--bloom-size", type=int, default=128)
+    p.add_argument("--enc-mode", default="fernet", choices=["fernet", "aesgcm", "chacha20"])
+    p.add_argument("--backend", default="bloom", choices=["bloom", "xor"], help="per-document filter backend")
+    p.add_argument("--fingerprint-bits", type=_fingerprint_bits, default=None,
+                   help="fingerprint size of the xor backend (default: match the Bloom false positive rate)")
+    p.add_argument("--memory-budget", type=int, default=None, help="keep at most N bytes of ciphertexts in memory")
+    p.add_argument("--storage", default="data/documents.dat", help="data file for tiered storage")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("search", help="search a persisted index")
+    p.add_argument("words", nargs="*", help="keywords to search (interactive if omitted)")
+    p.add_argument("--index", default=INDEX_FILE)
+    p.add_argument("--keys", default=KEYS_FILE)
+    p.add_argument("--decrypt", action="store_true", help="fetch, decrypt and print the matching documents")
+    p.add_argument("--cache-size", type=int, default=0, help="cache results of up to N trapdoors")
+    p.add_argument("--query-mode", default="constant_time", choices=["constant_time", "fast"])
+    p.add_argument("--memory-budget", type=int, default=None, help="keep at most N bytes of ciphertexts in memory")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("serve", help="serve a persisted index over TCP")
+    p.add_argument("--index", default=INDEX_FILE)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--cache-size", type=int, default=0, help="cache results of up to N trapdoors")
+    p.add_argument("--query-mode", default="constant_time", choices=["constant_time", "fast"])
+    p.add_argument("--memory-budget", type=int, default=None, help="keep at most N bytes of ciphertexts in memory")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("bench", help="benchmark searches on a persisted index")
+    p.add_argument("words", nargs="*", help="keywords to benchmark (default: all diseases)")
+    p.add_argument("--index", default=INDEX_FILE)
+    p.add_argument("--keys", default=KEYS_FILE)
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--query-mode", default="both", choices=["both", "constant_time", "fast"])
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("load", help="replay a concurrent keyword workload and report latency percentiles")
+    p.add_argument("--index", default=INDEX_FILE)
+    p.add_argument("--keys", default=KEYS_FILE)
+    p.add_argument("--connect", default=None, help="HOST:PORT of a running `serve` (in-process if omitted)")
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--rate", type=float, default=None, help="arrival rate in requests/s (closed loop if omitted)")
+    p.add_argument("--sample-interval", type=float, default=1.0)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--cache-size", type=int, default=0, help="in-process only")
+    p.add_argument("--query-mode", default="constant_time", choices=["constant_time", "fast"], help="in-process only")
+    p.add_argument("--memory-budget", type=int, default=None, help="in-process only")
+    p.add_argument("--fetch", action="store_true", help="also fetch the matching documents")
+    p.set_defaults(func=cmd_load)
+
+    p = sub.add_parser("sweep", help="run a cached, parallel parameter sweep")
+    p.add_argument("--generator", nargs="+", default=["proportion"], choices=["proportion", "fixed"])
+    p.add_argument("--num-docs", nargs="+", type=int, default=[1000])
+    p.add_argument("--keywords-per-doc", nargs="+", type=int, default=[5])
+    p.add_argument("--proportion", nargs="+", type=float, default=[0.4])
+    p.add_argument("--r", nargs="+", type=int, default=[18])
+    p.add_argument("--bloom-size", nargs="+", type=int, default=[128])
+    p.add_argument("--keyword", nargs="+", default=["hepatite"])
+    p.add_argument("--query-mode", nargs="+", default=["constant_time"], choices=["constant_time", "fast"])
+    p.add_argument("--backend", nargs="+", default=["bloom"], choices=["bloom", "xor"])
+    p.add_argument("--fingerprint-bits", nargs="+", type=_fingerprint_bits, default=[None],
+                   help="xor fingerprint sizes, 'auto' matches the Bloom false positive rate")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--max-parallel-docs", type=int, default=1_000_000,
+                   help="documents built at the same time across workers (bounds memory)")
+    p.add_argument("--cache", default="data/cache")
+    p.add_argument("--output", default="data/experiments/results.csv")
+    p.set_defaults(func=cmd_sweep)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from core.client import Client
+from core.server import Server
+
+WORDS = ["asma", "gripe", "diabetes", "hepatite", "rinite", "sinusite", "bronquite", "otite"]
+
+
+class RecordingServer(Server):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetched = []
+
+    def fetch(self, ids):
+        self.fetched.extend(ids)
+        return super().fetch(ids)
+
+
+def populated(client, server, num_docs=40):
+    documents = {}
+    for i in range(num_docs):
+        # every fourth document mentions "asma"
+        words = [WORDS[i % 4], WORDS[4 + i % 4]]
+        documents[f"doc{i}"] = words
+        server.store(f"doc{i}", client.encrypt_documents({f"doc{i}": " ".join(words)})[f"doc{i}"],
+                     client.create_index(f"doc{i}", words), client.create_digest(f"doc{i}", words))
+    return documents
+
+
+def test_retrieve_drops_index_false_positives_before_fetching():
+    # an 8-bit Bloom filter with 18 hash functions is nearly all ones: most documents match
+    client = Client(bloom_size=8, enc_mode="aesgcm")
+    server = RecordingServer()
+    documents = populated(client, server)
+    expected = {D_id for D_id, words in documents.items() if "asma" in words}
+
+    candidates = server.search(client.build_trapdoor("asma"), client.s)
+    assert expected <= set(candidates) and len(candidates) > len(expected)
+
+    retrieved = client.retrieve(server, "asma", candidates=candidates)
+    assert set(retrieved) == expected
+    assert all(retrieved[D_id].split()[0] == "asma" for D_id in expected)
+    assert sorted(server.fetched) == sorted(expected)
+    assert client.digest_candidates == len(candidates)
+    assert client.false_discovery_rate() == (len(candidates) - len(expected)) / len(candidates)
+
+
+def test_documents_without_a_digest_are_kept():
+    client = Client(bloom_size=8, enc_mode="chacha20")
+    server = RecordingServer()
+    server.store("plain", client.encrypt_documents({"plain": "gripe"})["plain"], client.create_index("plain", ["gripe"]))
+    populated(client, server, num_docs=4)
+
+    retrieved = client.retrieve(server, "asma")
+    assert "doc0" in retrieved and "doc1" not in retrieved
+    # the index says "plain" may contain the keyword and there is no digest to prove otherwise
+    assert ("plain" in retrieved) == ("plain" in server.search(client.build_trapdoor("asma"), client.s))
+
+
+def test_digest_is_padded_like_the_index():
+    client = Client(enc_mode="aesgcm")
+    assert len(client.create_digest("doc1", ["asma"] * 3)) == len(client.create_digest("doc1", ["asma", "gripe", "otite"]))
+    assert client.filter_candidates("asma", {"doc1": client.create_digest("doc1", ["asma"] * 3)}) == ["doc1"]
+    assert client.filter_candidates("gripe", {"doc1": client.create_digest("doc1", ["asma"] * 3)}) == []
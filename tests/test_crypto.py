@@ -0,0 +1,77 @@
+import io
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from core.client import Client
+from core.crypto import aead_decrypt_chunks, aead_encrypt_chunks, aead_keygen, split_chunks
+
+CHUNK_SIZE = 64
+
+
+def encrypt(key, algorithm, data, associated_data=b"doc1"):
+    return b"".join(aead_encrypt_chunks(key, algorithm, split_chunks(data, CHUNK_SIZE), associated_data, CHUNK_SIZE))
+
+
+def decrypt(key, ciphertext, associated_data=b"doc1"):
+    return b"".join(aead_decrypt_chunks(key, io.BytesIO(ciphertext), associated_data))
+
+
+@pytest.mark.parametrize("algorithm", ["aesgcm", "chacha20"])
+@pytest.mark.parametrize("size", [0, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 2 * CHUNK_SIZE])
+def test_round_trip_at_chunk_boundaries(algorithm, size):
+    key = aead_keygen()
+    data = bytes(range(256)) * (size // 256 + 1)
+    data = data[:size]
+    assert decrypt(key, encrypt(key, algorithm, data)) == data
+
+
+@pytest.mark.parametrize("size", [CHUNK_SIZE + 1, 2 * CHUNK_SIZE])
+def test_truncated_ciphertext_is_rejected(size):
+    key = aead_keygen()
+    ciphertext = encrypt(key, "aesgcm", b"x" * size)
+    # drop the last sealed chunk: the new last chunk was not sealed with the last flag
+    last_chunk = (size - 1) % CHUNK_SIZE + 1 + 16
+    with pytest.raises(InvalidTag):
+        decrypt(key, ciphertext[:-last_chunk])
+
+
+def test_wrong_document_id_is_rejected():
+    key = aead_keygen()
+    ciphertext = encrypt(key, "chacha20", b"secret", b"doc1")
+    with pytest.raises(InvalidTag):
+        decrypt(key, ciphertext, b"doc2")
+
+
+def test_every_ciphertext_uses_a_fresh_salt():
+    key = aead_keygen()
+    header_size = 32
+    headers = {encrypt(key, "aesgcm", b"same")[:header_size] for _ in range(20)}
+    assert len(headers) == 20
+
+
+def test_fernet_document_still_decrypts_with_an_aead_client(tmp_path):
+    client = Client(enc_mode="fernet")
+    client.encrypt_document("doc1", "old document", tmp_path)
+    client.enc_mode = "aesgcm"   # e.g. keys reloaded after switching modes
+    client.encrypt_document("doc2", "new document", tmp_path)
+
+    assert (tmp_path / "doc1.enc").read_bytes().startswith(b"gAAAAA")
+    assert client.decrypt_document("doc1", tmp_path) == "old document"
+    assert client.decrypt_document("doc2", tmp_path) == "new document"
+    assert client.decrypt("doc1", (tmp_path / "doc1.enc").read_bytes()) == "old document"
+
+
+def test_key_file_is_private_and_reloads(tmp_path):
+    client = Client(enc_mode="aesgcm")
+    path = tmp_path / "keys.pkl"
+    path.write_bytes(b"stale")
+    path.chmod(0o644)
+    client.save_keys(path)
+    client.save_keys(tmp_path / "new" / "keys.pkl")
+
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert (tmp_path / "new" / "keys.pkl").stat().st_mode & 0o777 == 0o600
+    restored = Client.load_keys(path)
+    assert restored.K_priv == client.K_priv
+    assert restored.decrypt("doc1", client.encrypt_documents({"doc1": "text"})["doc1"]) == "text"
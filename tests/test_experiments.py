@@ -0,0 +1,35 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.experiments import _map_within_budget, expand_sweep
+
+
+def test_points_in_flight_stay_within_the_document_budget():
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def build(point, cache_folder):
+        with lock:
+            state["in_flight"] += point["num_docs"]
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.01)
+        with lock:
+            state["in_flight"] -= point["num_docs"]
+        return point["num_docs"] * 2
+
+    points = [{"num_docs": n} for n in (200, 500, 1000, 2000, 5000, 100, 100)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = _map_within_budget(pool, build, points, "unused", max_parallel_docs=1000)
+
+    assert results == [p["num_docs"] * 2 for p in points]   # in input order
+    assert state["peak"] == 5000                          # larger points run alone
+
+
+def test_fingerprint_bits_do_not_multiply_bloom_points():
+    points = expand_sweep({"backend": ["bloom", "xor"], "fingerprint_bits": [None, 8], "r": [10, 18]})
+
+    bloom = [p for p in points if p["backend"] == "bloom"]
+    xor = [p for p in points if p["backend"] == "xor"]
+    assert [(p["r"], p["fingerprint_bits"]) for p in bloom] == [(10, None), (18, None)]
+    assert sorted((p["r"], p["fingerprint_bits"] or 0) for p in xor) == [(10, 0), (10, 8), (18, 0), (18, 8)]
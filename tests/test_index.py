@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from core.crypto import keygen, prf, trapdoor
+from core.index import (
+    SecureIndex, XorFilter, bloom_false_positive_rate, fingerprint_bits_for,
+)
+
+R, S = 8, 16
+
+
+def random_hashes():
+    return [random.getrandbits(S) for _ in range(R)]
+
+
+def codewords(K_priv, D_id, word):
+    return [prf(D_id.encode(), str(t), S) for t in trapdoor(K_priv, word, S)]
+
+
+@pytest.mark.parametrize("fingerprint_bits", [1, 7, 8, 16, 17, 32, 33, 64])
+def test_xor_filter_has_no_false_negatives(fingerprint_bits):
+    members = [random_hashes() for _ in range(500)]
+    xf = XorFilter(fingerprint_bits)
+    for hashes in members:
+        xf.insert(hashes)
+    xf.seal()
+
+    assert all(xf.query(hashes) for hashes in members)
+    assert len(xf.fingerprints) == 3 * xf.block_length
+    assert max(xf.fingerprints) < 2 ** fingerprint_bits
+    assert xf.size_in_bits() == len(xf.fingerprints) * fingerprint_bits
+
+
+def test_xor_filter_false_positive_rate_is_about_two_to_minus_bits():
+    xf = XorFilter(8)
+    for _ in range(1000):
+        xf.insert(random_hashes())
+    xf.seal()
+
+    trials = 40000
+    false_positives = sum(xf.query(random_hashes()) for _ in range(trials))
+    expected = trials * xf.false_positive_rate()   # 2^-8 → ~156
+    assert 0.6 * expected < false_positives < 1.4 * expected
+
+
+@pytest.mark.parametrize("num_keys", [1, 2, 3, 5, 20])
+def test_tiny_key_sets_grow_the_table_until_they_peel(num_keys):
+    members = [random_hashes() for _ in range(num_keys)]
+    xf = XorFilter(16)
+    for hashes in members:
+        xf.insert(hashes)
+    xf.seal()
+
+    assert 3 * xf.block_length >= num_keys + 1
+    if num_keys == 2:
+        # two keys can never peel in 3 slots (both hit the same slot of every block): the table grew
+        assert xf.block_length >= 2
+    assert all(xf.query(hashes) for hashes in members)
+
+
+def test_empty_document_gets_the_widest_fingerprint():
+    K_priv = keygen(S, R)
+    index = SecureIndex(K_priv, 128, R, S, backend="xor")
+    index.build_index("doc1", [])
+    xf = index.indices["doc1"]
+
+    assert fingerprint_bits_for(bloom_false_positive_rate(128, R, 0)) == 64
+    assert xf.fingerprint_bits == 64
+    assert not xf.query(codewords(K_priv, "doc1", "asma"))
+
+
+def test_document_of_duplicate_words_is_padded_like_distinct_words():
+    K_priv = keygen(S, R)
+    index = SecureIndex(K_priv, 128, R, S, backend="xor")
+    index.build_index("dup", ["asma"] * 4)
+    index.build_index("distinct", ["asma", "gripe", "diabetes", "hepatite"])
+    dup, distinct = index.indices["dup"], index.indices["distinct"]
+
+    assert dup.query(codewords(K_priv, "dup", "asma"))
+    assert not dup.query(codewords(K_priv, "dup", "gripe"))
+    # one real key plus three random padding keys: same fingerprint width as four distinct words
+    assert dup.fingerprint_bits == distinct.fingerprint_bits
+    assert all(distinct.query(codewords(K_priv, "distinct", w)) for w in ["asma", "gripe", "diabetes", "hepatite"])
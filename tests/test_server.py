@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from core.client import Client
+from core.server import Server
+
+WORDS = ["asma", "diabetes", "hepatite", "gripe"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return Client(r=8)
+
+
+def search_all(server, client, words=WORDS):
+    return {w: server.search(client.build_trapdoor(w), client.s) for w in words}
+
+
+def test_replace_while_cached_matches_uncached_scan(client):
+    cached = Server(cache_size=16)
+    uncached = Server()
+    for server in (cached, uncached):
+        for i in range(20):
+            server.store(f"doc{i}", b"", client.create_index(f"doc{i}", [WORDS[i % len(WORDS)]]))
+    search_all(cached, client)   # fill the cache
+
+    # replaced documents keep their position; new ones are appended
+    operations = [
+        [("doc0", b"", client.create_index("doc0", ["diabetes"]))],   # no longer asma, now diabetes
+        [("doc5", b"", client.create_index("doc5", ["asma", "gripe"])),
+         ("doc21", b"", client.create_index("doc21", ["asma"]))],
+        [("doc2", b"", client.create_index("doc2", ["asma"]))],       # moves before doc4 in the asma results
+    ]
+    for batch in operations:
+        cached.store_batch(batch)
+        uncached.store_batch(batch)
+        assert search_all(cached, client) == search_all(uncached, client)
+
+    assert cached.cache_stats()["hits"] > 0
+    assert cached.search(client.build_trapdoor("asma"), client.s)[:3] == ["doc2", "doc4", "doc5"]
+
+
+class PausingIndex:
+    """Wraps a secure index and holds the first query until released"""
+    def __init__(self, index):
+        self.index = index
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def query(self, positions):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        return self.index.query(positions)
+
+
+def test_search_straddling_a_store_is_not_cached(client):
+    server = Server(cache_size=8)
+    paused = PausingIndex(client.create_index("doc0", ["asma"]))
+    server.store("doc0", b"", paused)
+    T = client.build_trapdoor("asma")
+    results = []
+
+    searcher = threading.Thread(target=lambda: results.append(server.search(T, client.s)))
+    searcher.start()
+    assert paused.entered.wait(5)
+    server.store("doc1", b"", client.create_index("doc1", ["asma"]))   # published mid-scan
+    paused.release.set()
+    searcher.join()
+
+    assert results == [["doc0"]]                         # the scan ran on the snapshot it started with
+    assert server.cache_stats()["entries"] == 0          # ... so its result was not cached
+    assert server.search(T, client.s) == ["doc0", "doc1"]
+
+
+def test_searches_see_whole_batches_during_concurrent_stores(client):
+    batch_size, batches = 5, 40
+    server = Server(cache_size=8)
+    for i in range(10):
+        server.store(f"base{i}", b"", client.create_index(f"base{i}", ["gripe"]))
+    T = client.build_trapdoor("asma")
+    expected = [f"new{i}" for i in range(batch_size * batches)]
+    errors = []
+
+    def writer():
+        for b in range(batches):
+            server.store_batch(
+                (f"new{i}", b"", client.create_index(f"new{i}", ["asma"]))
+                for i in range(b * batch_size, (b + 1) * batch_size)
+            )
+            # replacing a document copies the entry list; its results must not change
+            server.store(f"base{b % 10}", b"", client.create_index(f"base{b % 10}", ["gripe"]))
+
+    def reader():
+        previous = 0
+        try:
+            while writer_thread.is_alive():
+                results = server.search(T, client.s)
+                # a published batch is either fully visible or not at all, in store order
+                assert len(results) % batch_size == 0
+                assert results == expected[:len(results)]
+                assert len(results) >= previous
+                previous = len(results)
+        except AssertionError as e:
+            errors.append(e)
+
+    writer_thread = threading.Thread(target=writer)
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writer_thread.start()
+    for thread in readers:
+        thread.start()
+    writer_thread.join()
+    for thread in readers:
+        thread.join()
+
+    assert not errors, errors[0]
+    assert server.epoch == 10 + 2 * batches
+    assert server.search(T, client.s) == expected
+    server.clear_cache()
+    assert server.search(T, client.s) == expected
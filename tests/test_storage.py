@@ -0,0 +1,99 @@
+import os
+import pickle
+import threading
+
+from core.server import Server
+from core.storage import TieredDocumentStore
+
+
+def data_files(folder):
+    return sorted(name for name in os.listdir(folder) if name.startswith("docs.dat"))
+
+
+def filled_store(path, count=10, size=100, **kwargs):
+    store = TieredDocumentStore(path, **kwargs)
+    for i in range(count):
+        store[f"doc{i}"] = bytes([i]) * size
+    return store
+
+
+def test_hot_set_stays_within_the_byte_budget(tmp_path):
+    store = filled_store(tmp_path / "docs.dat", memory_budget=350)
+
+    stats = store.stats()
+    assert stats["hot_bytes"] <= 350
+    assert stats["hot_documents"] == 3                    # the three most recent writes
+    assert store["doc9"] == bytes([9]) * 100 and store.stats()["hits"] == 1
+
+    store["big"] = b"x" * 1000                            # larger than the budget: never kept in memory
+    assert store.stats()["hot_bytes"] <= 350
+    assert store["big"] == b"x" * 1000 and store.stats()["misses"] == 1
+    store.close()
+
+
+def test_misses_close_together_are_read_in_one_go(tmp_path):
+    store = filled_store(tmp_path / "docs.dat", memory_budget=0, readahead_gap=150)
+
+    documents = store.get_many(["doc1", "doc3", "doc2"])
+    assert documents == {f"doc{i}": bytes([i]) * 100 for i in (1, 2, 3)}
+    assert store.stats()["disk_reads"] == 1
+    assert store.stats()["bytes_read"] == 300
+
+    store.get_many(["doc0", "doc5", "doc9"])               # gaps of 400 bytes > readahead_gap
+    assert store.stats()["disk_reads"] == 4
+    store.close()
+
+
+def test_publish_renames_the_data_file_into_place(tmp_path):
+    path = tmp_path / "docs.dat"
+    store = filled_store(path)
+    assert not path.exists() and len(data_files(tmp_path)) == 1   # written to "<path>.<random>.new"
+
+    store.publish()
+    assert data_files(tmp_path) == ["docs.dat"] and path.stat().st_size == 1000
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored["doc4"] == bytes([4]) * 100
+    store.close()
+
+    # a second store for the same path replaces the file instead of appending to it
+    other = filled_store(path, count=5)
+    assert restored["doc7"] == bytes([7]) * 100          # the old file is untouched until publish
+    other.publish()
+    assert data_files(tmp_path) == ["docs.dat"] and path.stat().st_size == 500
+    restored.close()
+    other.close()
+
+
+def test_unpublished_data_files_are_removed(tmp_path):
+    first = filled_store(tmp_path / "docs.dat")
+    second = filled_store(tmp_path / "docs.dat")          # must not truncate the first one's file
+    assert len(data_files(tmp_path)) == 2
+    assert first["doc3"] == bytes([3]) * 100
+
+    first.close()
+    del second                                           # garbage collected without close()
+    assert data_files(tmp_path) == []
+
+
+def test_server_close_stops_prefetching_and_cleans_up(tmp_path):
+    server = Server(memory_budget=1000, storage_path=str(tmp_path / "docs.dat"), readahead_threshold=1)
+    server.documents["doc0"] = b"x"
+    starts = []
+    barrier = threading.Barrier(8)
+
+    def prefetch():
+        barrier.wait()
+        server._prefetch(["doc0"])
+        starts.append(server._prefetcher)
+
+    threads = [threading.Thread(target=prefetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(p) for p in starts}) == 1             # one executor, however many concurrent searches
+
+    with server:
+        pass
+    assert server._prefetcher is None
+    assert data_files(tmp_path) == []
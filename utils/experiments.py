@@ -0,0 +1,269 @@
+"""
+Parameter-sweep experiment runner.
+
+A sweep is a dictionary mapping each parameter to the list of values to test;
+every combination is one sweep point. Generated corpora and built indexes are
+cached on disk keyed by the parameters they depend on, so repeated sweeps (or
+points sharing a corpus) skip regeneration. Corpora and indexes are built in
+parallel worker processes; searches are then timed one point at a time, so the
+timings are not inflated by the other workers. All points are written to one
+consolidated CSV.
+
+    from utils.experiments import run_sweep
+    run_sweep({"r": [10, 18], "proportion": [0.1, 0.5]}, workers=4)
+"""
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+CACHE_FOLDER = "data/cache"
+RESULTS_FILE = "data/experiments/results.csv"
+# documents that may be generated or indexed at the same time across all workers:
+# a building index keeps one in-memory filter per document, so large points run alone
+MAX_PARALLEL_DOCS = 1_000_000
+
+# parameters of a sweep point and their default values
+DEFAULT_POINT = {
+    "generator": "proportion",   # "proportion" (generate_documents) or "fixed" (generate_documents_fixed_keywords)
+    "num_docs": 1000,
+    "keywords_per_doc": 5,
+    "proportion": 0.4,           # share of keywords that are `keyword` (proportion generator only)
+    "keyword": "hepatite",
+    "r": 18,
+    "bloom_size": 128,
+    "s": 16,
+    "seed": 0,
+    "backend": "bloom",              # per-document filter backend ("bloom" or "xor")
+    "fingerprint_bits": None,        # xor backend only; None matches the Bloom false positive rate
+    "query_mode": "constant_time",   # search-time only, does not affect the cached index
+}
+CORPUS_PARAMS = ("generator", "num_docs", "keywords_per_doc", "proportion", "keyword", "seed")
+INDEX_PARAMS = CORPUS_PARAMS + ("r", "bloom_size", "s", "backend", "fingerprint_bits")
+
+RESULT_FIELDS = list(DEFAULT_POINT) + [
+    "num_matches", "false_positives", "index_bits_per_doc", "index_fp_rate",
+    "index_time_sec", "search_time_sec", "index_cached",
+]
+
+
+def expand_sweep(sweep):
+    """
+    Expands {param: [values]} into the list of distinct sweep points (cartesian product),
+    filling unspecified parameters with DEFAULT_POINT
+    """
+    unknown = set(sweep) - set(DEFAULT_POINT)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    names = list(sweep)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in sweep.values()]
+    points = []
+    for combo in itertools.product(*values):
+        point = {**DEFAULT_POINT, **dict(zip(names, combo))}
+        if point["backend"] == "bloom":
+            point["fingerprint_bits"] = None   # xor-only, so bloom points differing in it are the same point
+        if point not in points:
+            points.append(point)
+    return points
+
+
+def _key(point, params):
+    relevant = {p: point[p] for p in params}
+    if point["generator"] == "fixed":
+        # the fixed-keywords generator ignores these, so equal corpora share a key
+        relevant.pop("proportion")
+        relevant.pop("keyword")
+    if point["backend"] == "bloom":
+        relevant.pop("fingerprint_bits", None)
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def corpus_folder(point, cache_folder=CACHE_FOLDER):
+    return os.path.join(cache_folder, "corpus", _key(point, CORPUS_PARAMS))
+
+
+def index_folder(point, cache_folder=CACHE_FOLDER):
+    return os.path.join(cache_folder, "index", _key(point, INDEX_PARAMS))
+
+
+def _publish(tmp_folder, folder):
+    # atomic rename, so a half-written folder is never mistaken for a cached one
+    try:
+        os.rename(tmp_folder, folder)
+    except OSError:
+        shutil.rmtree(tmp_folder, ignore_errors=True)   # another run published it first
+
+
+def ensure_corpus(point, cache_folder=CACHE_FOLDER):
+    """
+    Returns the folder holding the corpus for this point, generating it only if it is not cached
+    """
+    folder = corpus_folder(point, cache_folder)
+    if os.path.isdir(folder):
+        return folder
+
+    from utils.generators import generate_documents, generate_documents_fixed_keywords, get_faker
+
+    # seeded, so a cached corpus is the same one a fresh run would generate
+    random.seed(point["seed"])
+    get_faker().seed_instance(point["seed"])
+    tmp_folder = f"{folder}.tmp{os.getpid()}"
+    if point["generator"] == "fixed":
+        generate_documents_fixed_keywords(point["num_docs"], output_folder=tmp_folder, keywords_per_doc=point["keywords_per_doc"])
+    else:
+        generate_documents(
+            point["num_docs"],
+            output_folder=tmp_folder,
+            max_diseases_per_patient=point["keywords_per_doc"],
+            fixed_disease=point["keyword"],
+            fixed_proportion=point["proportion"],
+        )
+    _publish(tmp_folder, folder)
+    return folder
+
+
+def ensure_index(point, cache_folder=CACHE_FOLDER):
+    """
+    Returns (client, server, index_time, cached) for this point, building and caching
+    the index (together with the client keys it was built with) if needed
+    index_time is the CPU time of the build process, so indexes built side by side
+    in a worker pool are timed as if they had been built alone.
+    The returned server searches with point["query_mode"].
+    """
+    from core.client import Client
+    from core.server import Server
+    from utils.generators import load_documents_from_folder
+
+    folder = index_folder(point, cache_folder)
+    if os.path.isdir(folder):
+        with open(os.path.join(folder, "meta.json")) as f:
+            meta = json.load(f)
+        client = Client.load_keys(os.path.join(folder, "keys.pkl"))
+        server = Server.load(os.path.join(folder, "index.pkl"), query_mode=point["query_mode"])
+        return client, server, meta["index_time_sec"], True
+
+    documents = load_documents_from_folder(ensure_corpus(point, cache_folder))
+    client = Client(s=point["s"], r=point["r"], bloom_size=point["bloom_size"],
+                    filter_backend=point["backend"], fingerprint_bits=point["fingerprint_bits"])
+    server = Server(query_mode=point["query_mode"])
+
+    start = time.process_time()
+    server.store_batch((doc_id, b"", client.create_index(doc_id, tokens)) for doc_id, (_, tokens) in documents.items())
+    index_time = time.process_time() - start
+
+    tmp_folder = f"{folder}.tmp{os.getpid()}"
+    client.save_keys(os.path.join(tmp_folder, "keys.pkl"))
+    server.save(os.path.join(tmp_folder, "index.pkl"))
+    with open(os.path.join(tmp_folder, "meta.json"), "w") as f:
+        json.dump({**{p: point[p] for p in INDEX_PARAMS}, "index_time_sec": index_time}, f)
+    _publish(tmp_folder, folder)
+    return client, server, index_time, False
+
+
+def prepare_index(point, cache_folder=CACHE_FOLDER):
+    """
+    Builds and caches the index for this point if needed; returns True if it was already cached
+    """
+    if os.path.isdir(index_folder(point, cache_folder)):
+        return True
+    ensure_index(point, cache_folder)
+    return False
+
+
+def run_point(point, cache_folder=CACHE_FOLDER, repeats=5):
+    """
+    Runs one sweep point: loads or builds its index and measures the average search time for point["keyword"]
+    Next to the index size it reports the expected false positive rate per document
+    (index_fp_rate) and the false positives actually returned for the keyword, so
+    backends can be compared at a matched rate.
+    """
+    from utils.generators import load_documents_from_folder
+
+    client, server, index_time, cached = ensure_index(point, cache_folder)
+    T = client.build_trapdoor(point["keyword"])
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        matches = server.search(T, client.s)
+        durations.append(time.perf_counter() - start)
+
+    documents = load_documents_from_folder(corpus_folder(point, cache_folder))
+    false_positives = sum(point["keyword"] not in documents[D_id][1] for D_id in matches)
+    bits = [bf.size_in_bits() for bf in server.indices.values()]
+    fp_rates = [bf.false_positive_rate(client.r) for bf in server.indices.values()]
+    return {
+        **point,
+        "num_matches": len(matches),
+        "false_positives": false_positives,
+        "index_bits_per_doc": round(statistics.mean(bits), 1) if bits else 0,
+        "index_fp_rate": float(f"{statistics.mean(fp_rates):.3g}") if fp_rates else 0.0,
+        "index_time_sec": round(index_time, 6),
+        "search_time_sec": round(statistics.mean(durations), 6),
+        "index_cached": cached,
+    }
+
+
+def _map_within_budget(pool, fn, points, cache_folder, max_parallel_docs):
+    # like pool.map, but only submits a point while the points in flight hold at most
+    # max_parallel_docs documents (a larger point still runs, alone)
+    results, pending, in_flight = [None] * len(points), {}, 0
+    queue = list(enumerate(points))
+    while queue or pending:
+        while queue and (not pending or in_flight + queue[0][1]["num_docs"] <= max_parallel_docs):
+            i, point = queue.pop(0)
+            pending[pool.submit(fn, point, cache_folder)] = i
+            in_flight += point["num_docs"]
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = pending.pop(future)
+            in_flight -= points[i]["num_docs"]
+            results[i] = future.result()
+    return results
+
+
+def run_sweep(sweep, output=RESULTS_FILE, cache_folder=CACHE_FOLDER, workers=None, repeats=5,
+              max_parallel_docs=MAX_PARALLEL_DOCS):
+    """
+    Runs every point of the sweep and writes one consolidated CSV
+    - Distinct corpora are generated first, in parallel
+    - Distinct indexes are then built in parallel
+    - Finally the searches are timed serially, one point at a time
+    Building an index holds all of its filters in memory, so the points built at the
+    same time hold at most max_parallel_docs documents together; a larger point is built alone.
+    Returns the list of result rows, in sweep order.
+    """
+    points = expand_sweep(sweep)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        corpora, indexes = {}, {}
+        for point in points:
+            corpora.setdefault(corpus_folder(point, cache_folder), point)
+            indexes.setdefault(index_folder(point, cache_folder), point)
+        _map_within_budget(pool, ensure_corpus, list(corpora.values()), cache_folder, max_parallel_docs)
+        cached = dict(zip(indexes, _map_within_budget(
+            pool, prepare_index, list(indexes.values()), cache_folder, max_parallel_docs
+        )))
+
+    rows = []
+    for point in points:
+        row = {**run_point(point, cache_folder, repeats), "index_cached": cached[index_folder(point, cache_folder)]}
+        print(
+            f"{row['backend']}{'/' + str(row['fingerprint_bits'] or 'auto') if row['backend'] == 'xor' else ''} r={row['r']} bloom={row['bloom_size']} docs={row['num_docs']} kw/doc={row['keywords_per_doc']} "
+            f"p={row['proportion']} {row['query_mode']} → {row['index_bits_per_doc']} bits/doc (fp {row['index_fp_rate']:.2e}, {row['false_positives']} observed), "
+            f"index {row['index_time_sec']:.3f}s, search {row['search_time_sec']:.6f}s"
+            f"{' (cached index)' if row['index_cached'] else ''}"
+        )
+        rows.append(row)
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
@@ -1,9 +1,8 @@
 import os
 import random
 import math
-from faker import Faker
 
-fake = Faker('pt_BR')
+_fake = None
 DISEASES = ["diabetes", "hipertensao", "asma", "covid", "bronquite", "cancer", "dengue", "gripe", "hepatite", "alergia"]
 AGE_RANGE = range(1, 100)
 
@@ -31,11 +30,22 @@ def compute_bloom_parameters(n_keywords_per_doc, false_positive_rate=0.01):
     r = (m / n_keywords_per_doc) * math.log(2)
     return int(round(m)), int(round(r))
 
+def get_faker():
+    """
+    Returns the shared Faker('pt_BR') instance, importing Faker on first use only
+    so that loading documents does not pay its import and setup cost.
+    """
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker('pt_BR')
+    return _fake
+
 def generate_phone():
-    return fake.phone_number()
+    return get_faker().phone_number()
 
 def generate_patient_name():
-    return fake.name()
+    return get_faker().name()
 
 def generate_documents(n, output_folder="data/documents", max_diseases_per_patient=5, fixed_disease="hepatite", fixed_proportion=0.4):
     os.makedirs(output_folder, exist_ok=True)
@@ -65,7 +75,7 @@ def generate_documents(n, output_folder="data/documents", max_diseases_per_patie
     for i in range(1, n + 1):
         name = generate_patient_name()
         age = str(random.choice(AGE_RANGE))
-        neighborhood = fake.bairro()
+        neighborhood = get_faker().bairro()
         phone = generate_phone()
 
         # Select diseases for the patient
@@ -101,7 +111,7 @@ def generate_documents_fixed_keywords(n, output_folder="data/documents", keyword
     for i in range(1, n + 1):
         name = generate_patient_name()
         age = str(random.choice(AGE_RANGE))
-        neighborhood = fake.bairro()
+        neighborhood = get_faker().bairro()
         phone = generate_phone()
 
         # Select exactly `keywords_per_doc` diseases
@@ -0,0 +1,140 @@
+"""
+Concurrent-client load generator for the search server.
+
+Replays a keyword workload drawn from DISEASE_PROPORTIONS against a Server,
+either in-process or through a SearchService socket, with a configurable
+number of concurrent clients and an optional open-loop arrival rate.
+Reports throughput, latency percentiles and a timeline of server metrics.
+
+    from utils.loadgen import keyword_workload, run_load
+    report = run_load(lambda: server, client, keyword_workload(1000), concurrency=8, rate=50)
+"""
+import math
+import queue
+import random
+import threading
+import time
+
+from utils.generators import DISEASE_PROPORTIONS
+
+
+def keyword_workload(n, proportions=DISEASE_PROPORTIONS, seed=None):
+    """
+    Draws n query keywords, each with probability proportional to its weight
+    """
+    rng = random.Random(seed)
+    words = list(proportions)
+    return rng.choices(words, weights=[proportions[w] for w in words], k=n)
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile (p in [0, 100]) of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p * len(sorted_values) / 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_load(connect, client, workload, concurrency=4, rate=None, sample_interval=1.0, seed=None, fetch=False):
+    """
+    Replays the workload and returns a report dictionary
+
+    - connect: callable returning a search target (a Server or a RemoteServer);
+      it is called once per worker thread plus once for the metrics sampler
+    - client: Client that builds the trapdoors (built up front, not timed)
+    - concurrency: number of concurrent clients
+    - rate: requests per second with Poisson arrivals (open loop); None sends
+      requests back to back (closed loop)
+    - sample_interval: seconds between samples of the server-side metrics
+    - fetch: also fetch the matching documents, as part of each request
+
+    In open loop, latency is measured from each request's scheduled arrival time,
+    so time spent queued behind a saturated server is counted.
+    """
+    trapdoors = {w: client.build_trapdoor(w) for w in set(workload)}
+
+    # arrival schedule, as offsets in seconds from the start of the run
+    rng = random.Random(seed)
+    offsets, t = [], 0.0
+    for _ in workload:
+        offsets.append(t if rate else None)
+        if rate:
+            t += rng.expovariate(rate)
+
+    requests = queue.Queue()
+    for offset, word in zip(offsets, workload):
+        requests.put((offset, word))
+
+    latencies = []
+    errors = []
+    results_lock = threading.Lock()
+    done = threading.Event()
+
+    def worker(target):
+        while True:
+            try:
+                offset, word = requests.get_nowait()
+            except queue.Empty:
+                return
+            if offset is not None:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sent = time.perf_counter()
+            try:
+                matches = target.search(trapdoors[word], client.s)
+                if fetch:
+                    target.fetch(matches)
+            except Exception as e:
+                with results_lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            finished = time.perf_counter()
+            with results_lock:
+                latencies.append(finished - (start + offset if offset is not None else sent))
+
+    timeline = []
+
+    def sampler(target):
+        while not done.wait(sample_interval):
+            with results_lock:
+                completed = len(latencies)
+            timeline.append({"elapsed_sec": time.perf_counter() - start, "completed": completed, **target.metrics()})
+
+    targets = [connect() for _ in range(concurrency)]
+    metrics_target = connect()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(target,)) for target in targets]
+    sampler_thread = threading.Thread(target=sampler, args=(metrics_target,), daemon=True)
+    sampler_thread.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+    done.set()
+    sampler_thread.join()
+    timeline.append({"elapsed_sec": duration, "completed": len(latencies), **metrics_target.metrics()})
+
+    for target in targets + [metrics_target]:
+        if hasattr(target, "close"):
+            target.close()
+
+    latencies.sort()
+    return {
+        "requests": len(workload),
+        "completed": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "rate": rate,
+        "duration_sec": duration,
+        "throughput_rps": len(latencies) / duration if duration else 0.0,
+        "latency_mean_sec": sum(latencies) / len(latencies) if latencies else 0.0,
+        "latency_p50_sec": percentile(latencies, 50),
+        "latency_p95_sec": percentile(latencies, 95),
+        "latency_p99_sec": percentile(latencies, 99),
+        "latency_max_sec": latencies[-1] if latencies else 0.0,
+        "timeline": timeline,
+    }